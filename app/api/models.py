@@ -1,5 +1,8 @@
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Literal, Optional
+
+LogLevel = Literal["none", "summary", "full"]
+SortOrder = Literal["asc", "desc"]
 
 class GraphCreate(BaseModel):
     workflow_type: str
@@ -8,6 +11,16 @@ class GraphCreate(BaseModel):
 class GraphRun(BaseModel):
     graph_id: str
     initial_state: Dict[str, Any]
+    priority: int = 0
+    profile: bool = False
+    trace_memory: bool = False
+    record_history: bool = False
+    checkpoint: bool = False
+    deadline: Optional[float] = None
+    fields: Optional[List[str]] = None
+    exclude_inputs: bool = False
+    log_level: LogLevel = "full"
+    coalesce: bool = True
 
 class GraphResponse(BaseModel):
     graph_id: str
@@ -23,8 +36,42 @@ class StateResponse(BaseModel):
     run_id: str
     state: Dict[str, Any]
     metadata: Dict[str, Any]
+    execution_log: Optional[List[Dict[str, Any]]] = None
+
+class HistoryResponse(BaseModel):
+    run_id: str
+    steps: List[Dict[str, Any]]
+    total: int
+
+class HistoryStepResponse(BaseModel):
+    run_id: str
+    step: int
+    node: Optional[str] = None
+    state: Dict[str, Any]
 
 class AsyncRunResponse(BaseModel):
     run_id: str
     status: str
     message: str
+
+class GraphRunBatch(BaseModel):
+    graph_id: str
+    initial_states: List[Dict[str, Any]]
+    concurrency: int = 8
+    stream: bool = False
+    coalesce: bool = True
+
+class BatchItemResult(BaseModel):
+    index: int
+    run_id: str
+    status: str
+    final_state: Optional[Dict[str, Any]] = None
+    execution_log: Optional[List[Dict[str, Any]]] = None
+    metadata: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class BatchRunResponse(BaseModel):
+    graph_id: str
+    total: int
+    failed: int
+    results: List[BatchItemResult]
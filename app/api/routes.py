@@ -1,133 +1,536 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from app.api.models import GraphCreate, GraphRun, GraphResponse, RunResponse, StateResponse, AsyncRunResponse
-from app.workflows.code_review import create_code_review_graph
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from app.api.models import (
+    GraphCreate, GraphRun, GraphResponse, RunResponse, StateResponse, AsyncRunResponse,
+    GraphRunBatch, BatchItemResult, BatchRunResponse, HistoryResponse, HistoryStepResponse, LogLevel, SortOrder
+)
+from app.api.responses import FastJSONResponse
+from app.workflows.templates import graph_templates
 from app.storage import storage
-from typing import Dict
+from app.checkpoints import checkpoint_store
+from app.engine.cache import estimate_size, node_cache
+from app.engine.coalesce import run_coalescer
+from app.engine.events import Emitter, event_bus, stream_events
+from app.engine.history import history_steps, state_at
+from app.engine.state import WorkflowState
+from app.jobs import Job, QueueFullError, create_job_queue
+from app.metrics import metrics
+from app.tools.code_tools import code_hash
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+import asyncio
+import json
 import uuid
 
 router = APIRouter(prefix="/graph", tags=["graph"])
 
+MAX_BATCH_SIZE = 1000
+MAX_BATCH_CONCURRENCY = 64
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+LOG_SUMMARY_KEYS = ("node", "status", "iteration", "error")
+
 @router.post("/create", response_model=GraphResponse)
 async def create_graph(request: GraphCreate):
     graph_id = str(uuid.uuid4())
     
-    if request.workflow_type == "code_review":
-        graph = create_code_review_graph(graph_id, request.config)
-    else:
-        raise HTTPException(status_code=400, detail=f"Unknown workflow type: {request.workflow_type}")
+    try:
+        graph = graph_templates.acquire(request.workflow_type, graph_id, request.config)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    storage.add_graph(graph_id, graph)
+    try:
+        storage.add_graph(graph_id, graph)
+    except Exception:
+        graph.release()
+        raise
     
     return GraphResponse(
         graph_id=graph_id,
         message=f"Graph created successfully with type: {request.workflow_type}"
     )
 
+def _run_options(request: GraphRun) -> Dict[str, Any]:
+    return {
+        "profile": request.profile,
+        "trace_memory": request.trace_memory,
+        "record_history": request.record_history,
+        "checkpoint": request.checkpoint,
+        "deadline": request.deadline,
+        "view": {"fields": request.fields, "exclude_inputs": request.exclude_inputs, "log_level": request.log_level}
+    }
+
+def _respond(model: Type[BaseModel], fast: bool, **content):
+    if fast:
+        return FastJSONResponse(content)
+    return model(**content)
+
+def _coalescing(request: GraphRun) -> bool:
+    return request.coalesce and not (
+        request.profile or request.trace_memory or request.record_history or request.checkpoint or request.deadline
+    )
+
+def _coalesced_runner(graph_id: str) -> Callable:
+    async def runner(graph, initial_state: Dict[str, Any], run_id: str, on_event: Emitter = None, **options):
+        (final_state, execution_log), source = await run_coalescer.run(
+            run_coalescer.make_key(graph_id, initial_state),
+            lambda: graph.run(initial_state, run_id, on_event=on_event, **options),
+            cacheable=lambda result: result[0].metadata.get("completed", False),
+            size=lambda result: estimate_size((result[0].data, result[0].metadata, result[1]))
+        )
+        if source == "executed":
+            return final_state, execution_log
+        
+        metadata = {
+            **final_state.metadata,
+            "run_id": run_id,
+            "coalesced": source,
+            "coalesced_from": final_state.metadata.get("run_id")
+        }
+        return WorkflowState(data=final_state.data, metadata=metadata, iteration=final_state.iteration), execution_log
+    
+    return runner
+
+def _project_state(data: Dict[str, Any], inputs: Iterable[str], fields: Optional[List[str]] = None,
+                   exclude_inputs: bool = False) -> Dict[str, Any]:
+    if fields is not None:
+        data = {key: data[key] for key in fields if key in data}
+    if exclude_inputs:
+        inputs = set(inputs)
+        data = {key: value for key, value in data.items() if key not in inputs}
+    return data
+
+def _slim_log(execution_log: List[Dict[str, Any]], log_level: str) -> List[Dict[str, Any]]:
+    if log_level == "none":
+        return []
+    if log_level == "summary":
+        return [{key: entry[key] for key in LOG_SUMMARY_KEYS if key in entry} for entry in execution_log]
+    return execution_log
+
+def _resolve_base(initial_state: Dict[str, Any]) -> Dict[str, Any]:
+    base_run_id = initial_state.get("base_run_id")
+    if not base_run_id or initial_state.get("base_hash"):
+        return initial_state
+    
+    base_run = storage.get_run(base_run_id)
+    base_state = base_run["state"] if base_run else {}
+    base_hash = base_state.get("code_hash")
+    if base_hash is None and isinstance(base_state.get("code"), str):
+        base_hash = code_hash(base_state["code"])
+    return {**initial_state, "base_hash": base_hash}
+
+async def _execute_run(graph, graph_id: str, initial_state: Dict, run_id: str, on_event: Emitter = None,
+                       runner: Callable = None, options: Dict[str, Any] = None):
+    options = dict(options or {})
+    view = options.pop("view", None) or {}
+    inputs = list(initial_state)
+    initial_state = _resolve_base(initial_state)
+    if runner is None:
+        final_state, execution_log = await graph.run(initial_state, run_id, on_event=on_event, **options)
+    else:
+        final_state, execution_log = await runner(graph, initial_state, run_id, on_event, **options)
+    
+    run_data = {
+        "graph_id": graph_id,
+        "status": "completed" if final_state.metadata.get("completed", False) else "failed",
+        "state": _project_state(final_state.data, inputs, view.get("fields"), view.get("exclude_inputs", False)),
+        "metadata": final_state.metadata,
+        "log": execution_log if options.get("record_history") else _slim_log(execution_log, view.get("log_level", "full")),
+        "inputs": inputs
+    }
+    if options.get("record_history"):
+        run_data["initial_state"] = initial_state
+    storage.add_run(run_id, run_data)
+    
+    return final_state, execution_log
+
 @router.post("/run", response_model=RunResponse)
-async def run_graph(request: GraphRun):
+async def run_graph(request: GraphRun, fast: bool = False):
     graph = storage.get_graph(request.graph_id)
     if not graph:
         raise HTTPException(status_code=404, detail="Graph not found")
     
     run_id = str(uuid.uuid4())
     
-    final_state, execution_log = await graph.run(request.initial_state, run_id)
+    runner = _coalesced_runner(request.graph_id) if _coalescing(request) else None
+    final_state, execution_log = await _execute_run(
+        graph, request.graph_id, request.initial_state, run_id, runner=runner, options=_run_options(request)
+    )
     
-    storage.add_run(run_id, {
-        "state": final_state.data,
-        "metadata": final_state.metadata,
-        "log": execution_log
-    })
+    return _respond(
+        RunResponse, fast,
+        run_id=run_id,
+        final_state=_project_state(final_state.data, request.initial_state, request.fields, request.exclude_inputs),
+        execution_log=_slim_log(execution_log, request.log_level),
+        metadata=final_state.metadata
+    )
+
+@router.post("/resume/{run_id}", response_model=RunResponse)
+async def resume_run(run_id: str, fast: bool = False):
+    saved = checkpoint_store.load(run_id)
+    if saved is None:
+        raise HTTPException(status_code=404, detail="No checkpoint found for run")
+    
+    graph_id = saved["header"]["graph_id"]
+    graph = storage.get_graph(graph_id)
+    if not graph:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    
+    options = {"checkpoint": True, "resume": saved, "record_history": saved["header"].get("record_history", False)}
+    final_state, execution_log = await _execute_run(
+        graph, graph_id, saved["header"]["initial_state"], run_id, options=options
+    )
     
-    return RunResponse(
+    return _respond(
+        RunResponse, fast,
         run_id=run_id,
         final_state=final_state.data,
         execution_log=execution_log,
         metadata=final_state.metadata
     )
 
+@router.post("/run-batch", response_model=BatchRunResponse)
+async def run_graph_batch(request: GraphRunBatch):
+    graph = storage.get_graph(request.graph_id)
+    if not graph:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    if len(request.initial_states) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch size exceeds {MAX_BATCH_SIZE}")
+    
+    semaphore = asyncio.Semaphore(max(1, min(request.concurrency, MAX_BATCH_CONCURRENCY)))
+    runner = _coalesced_runner(request.graph_id) if request.coalesce else None
+    
+    async def run_item(index: int, initial_state: Dict) -> BatchItemResult:
+        run_id = str(uuid.uuid4())
+        async with semaphore:
+            try:
+                final_state, execution_log = await _execute_run(graph, request.graph_id, initial_state, run_id,
+                                                                runner=runner)
+            except Exception as e:
+                return BatchItemResult(index=index, run_id=run_id, status="failed", error=str(e))
+        return BatchItemResult(
+            index=index,
+            run_id=run_id,
+            status="completed",
+            final_state=final_state.data,
+            execution_log=execution_log,
+            metadata=final_state.metadata
+        )
+    
+    tasks = [asyncio.ensure_future(run_item(i, state)) for i, state in enumerate(request.initial_states)]
+    
+    if request.stream:
+        async def stream_results():
+            try:
+                for task in asyncio.as_completed(tasks):
+                    result = await task
+                    yield result.model_dump_json() + "\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+        
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+    
+    results = await asyncio.gather(*tasks)
+    return BatchRunResponse(
+        graph_id=request.graph_id,
+        total=len(results),
+        failed=sum(1 for result in results if result.status == "failed"),
+        results=results
+    )
+
+def _sse(event: Dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+@router.post("/run-stream")
+async def run_graph_stream(request: GraphRun):
+    graph = storage.get_graph(request.graph_id)
+    if not graph:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    
+    run_id = str(uuid.uuid4())
+    
+    async def events():
+        try:
+            async for event in stream_events(
+                lambda emit: _execute_run(graph, request.graph_id, request.initial_state, run_id,
+                                          on_event=emit, options=_run_options(request))
+            ):
+                yield _sse(event)
+        except Exception as e:
+            yield _sse({"event": "run_end", "run_id": run_id, "status": "failed", "error": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/events/{run_id}")
+async def stream_run_events(run_id: str):
+    queue = event_bus.subscribe(run_id)
+    if queue is None:
+        run_data = storage.get_run(run_id)
+        if not run_data:
+            raise HTTPException(status_code=404, detail="Run not found")
+        final_event = {
+            "event": "run_end",
+            "run_id": run_id,
+            "status": run_data.get("status", "completed"),
+            "final_state": run_data["state"],
+            "metadata": run_data["metadata"]
+        }
+        if "error" in run_data:
+            final_event["error"] = run_data["error"]
+        
+        async def finished():
+            yield _sse(final_event)
+        
+        return StreamingResponse(finished(), media_type="text/event-stream", headers=SSE_HEADERS)
+    
+    async def events():
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield _sse(event)
+        finally:
+            event_bus.unsubscribe(run_id, queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.websocket("/ws/run")
+async def run_graph_ws(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        request = GraphRun(**await websocket.receive_json())
+    except (ValidationError, ValueError, TypeError) as e:
+        await websocket.send_text(json.dumps({"event": "error", "error": str(e)}))
+        await websocket.close(code=1003)
+        return
+    
+    graph = storage.get_graph(request.graph_id)
+    if not graph:
+        await websocket.send_text(json.dumps({"event": "error", "error": "Graph not found"}))
+        await websocket.close(code=1008)
+        return
+    
+    run_id = str(uuid.uuid4())
+    try:
+        async for event in stream_events(
+            lambda emit: _execute_run(graph, request.graph_id, request.initial_state, run_id,
+                                      on_event=emit, options=_run_options(request))
+        ):
+            await websocket.send_text(json.dumps(event, default=str))
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        await websocket.send_text(json.dumps({"event": "run_end", "run_id": run_id, "status": "failed", "error": str(e)}))
+    await websocket.close()
+
 @router.get("/state/{run_id}", response_model=StateResponse)
-async def get_state(run_id: str):
+async def get_state(run_id: str, fields: Optional[List[str]] = Query(None), exclude_inputs: bool = False,
+                    log_level: LogLevel = "none", fast: bool = False):
     run_data = storage.get_run(run_id)
     if not run_data:
         raise HTTPException(status_code=404, detail="Run not found")
     
-    return StateResponse(
+    if fields is not None:
+        fields = [name for value in fields for name in value.split(",") if name]
+    
+    return _respond(
+        StateResponse, fast,
         run_id=run_id,
-        state=run_data["state"],
-        metadata=run_data["metadata"]
+        state=_project_state(run_data["state"], run_data.get("inputs", ()), fields, exclude_inputs),
+        metadata=run_data["metadata"],
+        execution_log=_slim_log(run_data["log"], log_level) if log_level != "none" else None
+    )
+
+def _history_run(run_id: str) -> Dict[str, Any]:
+    run_data = storage.get_run(run_id)
+    if not run_data:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if "initial_state" not in run_data:
+        raise HTTPException(status_code=409, detail="Run was not recorded with record_history")
+    return run_data
+
+@router.get("/state/{run_id}/history", response_model=HistoryResponse)
+async def get_history(run_id: str):
+    run_data = _history_run(run_id)
+    steps = history_steps(run_data["log"])
+    return HistoryResponse(run_id=run_id, steps=steps, total=len(steps))
+
+@router.get("/state/{run_id}/history/{step}", response_model=HistoryStepResponse)
+async def get_state_at(run_id: str, step: int):
+    run_data = _history_run(run_id)
+    try:
+        data = state_at(run_data["initial_state"], run_data["log"], step)
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return HistoryStepResponse(
+        run_id=run_id,
+        step=step,
+        node=run_data["log"][step - 1]["node"] if step else None,
+        state=data
     )
 
 @router.get("/list")
-async def list_graphs():
-    graph_list = storage.list_graphs()
+async def list_graphs(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                      order: SortOrder = "asc", workflow_type: Optional[str] = None,
+                      created_after: Optional[float] = None, created_before: Optional[float] = None):
+    try:
+        graph_list, next_cursor = storage.list_graphs_page(
+            limit, cursor, order, workflow_type=workflow_type,
+            created_after=created_after, created_before=created_before
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "graphs": graph_list,
-        "total": len(graph_list)
+        "count": len(graph_list),
+        "next_cursor": next_cursor
     }
 
+@router.delete("/{graph_id}", response_model=GraphResponse)
+async def delete_graph(graph_id: str):
+    if not storage.remove_graph(graph_id):
+        raise HTTPException(status_code=404, detail="Graph not found")
+    return GraphResponse(graph_id=graph_id, message="Graph deleted")
+
 @router.get("/runs")
-async def list_runs():
-    run_list = storage.list_runs()
+async def list_runs(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                    order: SortOrder = "asc", status: Optional[str] = None, graph_id: Optional[str] = None,
+                    created_after: Optional[float] = None, created_before: Optional[float] = None):
+    try:
+        run_list, next_cursor = storage.list_runs_page(
+            limit, cursor, order, status=status, graph_id=graph_id,
+            created_after=created_after, created_before=created_before
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "runs": run_list,
-        "total": len(run_list)
+        "count": len(run_list),
+        "next_cursor": next_cursor
     }
 
-async def execute_graph_background(graph_id: str, initial_state: Dict, run_id: str):
+@router.get("/storage/stats")
+async def storage_stats(top: int = 10):
+    return storage.stats(top=top)
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return node_cache.stats()
+
+@router.get("/coalesce/stats")
+async def coalesce_stats():
+    return run_coalescer.stats()
+
+@router.get("/templates/stats")
+async def template_stats():
+    return graph_templates.stats()
+
+def _fail_run(graph_id: str, run_id: str, error: str, status: str = "failed"):
+    storage.add_run(run_id, {
+        "graph_id": graph_id,
+        "status": status,
+        "error": error,
+        "state": {},
+        "metadata": {},
+        "log": []
+    })
+    event_bus.publish(run_id, {"event": "run_end", "run_id": run_id, "status": status, "error": error})
+
+async def execute_graph_background(graph_id: str, initial_state: Dict, run_id: str, runner: Callable = None,
+                                   options: Dict[str, Any] = None):
     try:
         graph = storage.get_graph(graph_id)
         if not graph:
-            storage.add_run(run_id, {
-                "status": "failed",
-                "error": "Graph not found",
-                "state": {},
-                "metadata": {},
-                "log": []
-            })
+            _fail_run(graph_id, run_id, "Graph not found")
             return
         
-        final_state, execution_log = await graph.run(initial_state, run_id)
-        
         storage.add_run(run_id, {
-            "status": "completed",
-            "state": final_state.data,
-            "metadata": final_state.metadata,
-            "log": execution_log
-        })
-    except Exception as e:
-        storage.add_run(run_id, {
-            "status": "failed",
-            "error": str(e),
+            "graph_id": graph_id,
+            "status": "running",
             "state": {},
             "metadata": {},
             "log": []
         })
+        await _execute_run(graph, graph_id, initial_state, run_id, on_event=event_bus.emitter(run_id),
+                           runner=runner, options=options)
+    except asyncio.CancelledError:
+        _fail_run(graph_id, run_id, "Run cancelled", status="cancelled")
+        raise
+    except Exception as e:
+        _fail_run(graph_id, run_id, str(e))
+        raise
+
+job_queue = create_job_queue(execute_graph_background)
+
+metrics.gauge("job_queue_depth", "Jobs waiting in the run queue", callback=lambda: job_queue.depth())
+metrics.gauge("job_queue_running", "Jobs currently running", callback=lambda: job_queue.running)
+storage_runs = metrics.gauge("storage_runs", "Stored runs")
+storage_graphs = metrics.gauge("storage_graphs", "Stored graphs")
+storage_run_bytes = metrics.gauge("storage_run_bytes", "Approximate size of stored runs")
+
+def _collect_storage_stats():
+    stats = storage.stats(top=0)
+    storage_runs.set(stats["runs"])
+    storage_graphs.set(stats["graphs"])
+    storage_run_bytes.set(stats["run_bytes"])
+
+metrics.collector(_collect_storage_stats)
+metrics.gauge("graph_templates", "Distinct compiled graph templates", callback=lambda: graph_templates.stats()["templates"])
+metrics.gauge("run_coalesced_total", "Runs served by an in-flight or cached identical run",
+              callback=lambda: run_coalescer.coalesced + run_coalescer.hits, type="counter")
+metrics.gauge("node_cache_hits_total", "Node result cache hits", callback=lambda: node_cache.hits, type="counter")
+metrics.gauge("node_cache_misses_total", "Node result cache misses", callback=lambda: node_cache.misses, type="counter")
+
+@router.delete("/run/{run_id}")
+async def cancel_run(run_id: str):
+    run_data = storage.get_run(run_id)
+    if not run_data:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if run_data["status"] not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Run is already {run_data['status']}")
+    
+    cancelled = await job_queue.cancel(run_id)
+    if cancelled is None:
+        raise HTTPException(status_code=409, detail="Run is not active on this worker")
+    if cancelled == "queued":
+        _fail_run(run_data["graph_id"], run_id, "Run cancelled", status="cancelled")
+    
+    return {"run_id": run_id, "status": "cancelled", "was": cancelled}
+
+@router.get("/queue/stats")
+async def queue_stats():
+    return job_queue.stats()
 
 @router.post("/run-async", response_model=AsyncRunResponse)
-async def run_graph_async(request: GraphRun, background_tasks: BackgroundTasks):
+async def run_graph_async(request: GraphRun):
     graph = storage.get_graph(request.graph_id)
     if not graph:
         raise HTTPException(status_code=404, detail="Graph not found")
     
     run_id = str(uuid.uuid4())
     
+    event_bus.open(run_id)
+    try:
+        job_queue.submit(Job(run_id, request.graph_id, request.initial_state, request.priority,
+                             options=_run_options(request)))
+    except QueueFullError as e:
+        event_bus.close(run_id)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    
     storage.add_run(run_id, {
-        "status": "running",
+        "graph_id": request.graph_id,
+        "status": "queued",
         "state": {},
         "metadata": {},
         "log": []
     })
     
-    background_tasks.add_task(
-        execute_graph_background,
-        request.graph_id,
-        request.initial_state,
-        run_id
-    )
-    
     return AsyncRunResponse(
         run_id=run_id,
-        status="running",
-        message="Graph execution started in background"
+        status="queued",
+        message="Graph execution queued"
     )
@@ -0,0 +1,25 @@
+import os
+import tempfile
+from app.checkpoints.base import CheckpointStore
+from app.checkpoints.file import FileCheckpointStore
+from app.checkpoints.sqlite import SQLiteCheckpointStore
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(tempfile.gettempdir(), "workflow-checkpoints")
+
+def create_checkpoint_store(url: str = None) -> CheckpointStore:
+    url = url or os.environ.get("WORKFLOW_CHECKPOINTS", f"file:{DEFAULT_CHECKPOINT_DIR}")
+    if url.startswith("file:"):
+        return FileCheckpointStore(url[len("file:"):] or DEFAULT_CHECKPOINT_DIR)
+    if url.startswith("sqlite:"):
+        path = url[len("sqlite:"):]
+        if path.startswith("///"):
+            path = path[3:]
+        return SQLiteCheckpointStore(path or "checkpoints.db")
+    raise ValueError(f"Unknown checkpoint store: {url}")
+
+checkpoint_store = create_checkpoint_store()
+
+__all__ = [
+    "CheckpointStore", "FileCheckpointStore", "SQLiteCheckpointStore", "create_checkpoint_store",
+    "checkpoint_store"
+]
@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+class CheckpointStore(ABC):
+    @abstractmethod
+    def start(self, run_id: str, header: Dict[str, Any]):
+        pass
+    
+    @abstractmethod
+    def append(self, run_id: str, step: Dict[str, Any]):
+        pass
+    
+    @abstractmethod
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        pass
+    
+    @abstractmethod
+    def delete(self, run_id: str):
+        pass
+    
+    def close(self):
+        pass
@@ -0,0 +1,56 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Optional
+from app.checkpoints.base import CheckpointStore
+
+RUN_ID_PATTERN = re.compile(r"^[\w.-]+$")
+
+class FileCheckpointStore(CheckpointStore):
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def start(self, run_id: str, header: Dict[str, Any]):
+        with self._lock, open(self._path(run_id), "w") as f:
+            f.write(json.dumps(header, default=str) + "\n")
+    
+    def append(self, run_id: str, step: Dict[str, Any]):
+        line = json.dumps(step, default=str) + "\n"
+        with self._lock, open(self._path(run_id), "a") as f:
+            f.write(line)
+    
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            path = self._path(run_id)
+        except ValueError:
+            return None
+        if not os.path.exists(path):
+            return None
+        
+        with self._lock, open(path) as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return None
+        
+        steps = []
+        for line in lines[1:]:
+            try:
+                steps.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+        return {"header": json.loads(lines[0]), "steps": steps}
+    
+    def delete(self, run_id: str):
+        with self._lock:
+            try:
+                os.remove(self._path(run_id))
+            except (FileNotFoundError, ValueError):
+                pass
+    
+    def _path(self, run_id: str) -> str:
+        if not RUN_ID_PATTERN.match(run_id):
+            raise ValueError(f"Invalid run id: {run_id}")
+        return os.path.join(self.directory, f"{run_id}.jsonl")
@@ -0,0 +1,78 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+from app.checkpoints.base import CheckpointStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_id TEXT PRIMARY KEY,
+    header TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint_steps (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    step TEXT NOT NULL,
+    PRIMARY KEY (run_id, seq)
+);
+"""
+
+class SQLiteCheckpointStore(CheckpointStore):
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._next_seq: Dict[str, int] = {}
+    
+    def start(self, run_id: str, header: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM checkpoint_steps WHERE run_id = ?", (run_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, header) VALUES (?, ?)",
+                (run_id, json.dumps(header, default=str))
+            )
+            self._conn.execute("COMMIT")
+            self._next_seq[run_id] = 0
+    
+    def append(self, run_id: str, step: Dict[str, Any]):
+        with self._lock:
+            seq = self._next_seq.get(run_id)
+            if seq is None:
+                row = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) FROM checkpoint_steps WHERE run_id = ?", (run_id,)
+                ).fetchone()
+                seq = row[0]
+            self._conn.execute(
+                "INSERT INTO checkpoint_steps (run_id, seq, step) VALUES (?, ?, ?)",
+                (run_id, seq, json.dumps(step, default=str))
+            )
+            self._next_seq[run_id] = seq + 1
+    
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            header = self._conn.execute("SELECT header FROM checkpoints WHERE run_id = ?", (run_id,)).fetchone()
+            if header is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT step FROM checkpoint_steps WHERE run_id = ? ORDER BY seq", (run_id,)
+            ).fetchall()
+        return {"header": json.loads(header[0]), "steps": [json.loads(row[0]) for row in rows]}
+    
+    def delete(self, run_id: str):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM checkpoint_steps WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+            self._conn.execute("COMMIT")
+            self._next_seq.pop(run_id, None)
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
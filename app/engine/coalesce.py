@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from app.engine.cache import estimate_size
+
+class RunCoalescer:
+    def __init__(self, ttl_seconds: float = 5.0, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._results: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.hits = 0
+    
+    def make_key(self, graph_id: str, initial_state: Dict[str, Any]) -> str:
+        canonical = json.dumps(initial_state, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{graph_id}\0{canonical}".encode("utf-8", "surrogatepass")).hexdigest()
+    
+    async def run(self, key: str, execute: Callable[[], Awaitable[Any]], cacheable: Callable[[Any], bool] = None,
+                  size: Callable[[Any], int] = estimate_size) -> Tuple[Any, str]:
+        self._purge_expired()
+        cached = self._results.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self.hits += 1
+                return cached[1], "cached"
+            self._discard(key)
+        
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            return await asyncio.shield(shared), "coalesced"
+        
+        self.executions += 1
+        shared = self._inflight[key] = asyncio.ensure_future(execute())
+        shared.add_done_callback(lambda task: self._finish(key, task, cacheable, size))
+        return await asyncio.shield(shared), "executed"
+    
+    def clear(self):
+        self._results.clear()
+        self._bytes = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.hits = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "cached": len(self._results),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "hits": self.hits
+        }
+    
+    def _finish(self, key: str, task: asyncio.Future, cacheable: Callable[[Any], bool],
+                size: Callable[[Any], int]):
+        self._inflight.pop(key, None)
+        self._purge_expired()
+        if task.cancelled() or task.exception() is not None or self.ttl_seconds <= 0:
+            return
+        result = task.result()
+        if cacheable is not None and not cacheable(result):
+            return
+        nbytes = size(result)
+        if nbytes > self.max_bytes:
+            return
+        
+        self._discard(key)
+        self._results[key] = (time.monotonic() + self.ttl_seconds, result, nbytes)
+        self._bytes += nbytes
+        while len(self._results) > self.max_entries or self._bytes > self.max_bytes:
+            self._bytes -= self._results.popitem(last=False)[1][2]
+    
+    def _purge_expired(self):
+        now = time.monotonic()
+        while self._results:
+            key, (expires, _, _) = next(iter(self._results.items()))
+            if expires > now:
+                break
+            self._discard(key)
+    
+    def _discard(self, key: str):
+        entry = self._results.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+run_coalescer = RunCoalescer(
+    ttl_seconds=float(os.environ.get("WORKFLOW_COALESCE_TTL", 5.0)),
+    max_bytes=int(os.environ.get("WORKFLOW_COALESCE_MAX_BYTES", 64 * 1024 * 1024))
+)
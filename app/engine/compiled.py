@@ -0,0 +1,414 @@
+from concurrent.futures import Executor
+from types import MappingProxyType
+from typing import AsyncIterator, Callable, Any, Dict, List, Optional, Tuple, Union
+from app.engine.events import NODE_EVENTS, stream_events
+from app.engine.node import Node
+from app.engine.state import WorkflowState
+from app.metrics import record_run
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+PROFILE_TOP_FUNCTIONS = 20
+
+Successor = Union[int, Tuple[int, ...], None]
+
+class GraphValidationError(ValueError):
+    pass
+
+class RunContext:
+    def __init__(self, run_id: str, on_event: Callable[[Dict[str, Any]], None] = None,
+                 profile: bool = False, trace_memory: bool = False, record_history: bool = False,
+                 checkpoints: Any = None, deadline: float = None):
+        self.run_id = run_id
+        self.on_event = on_event
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.record_history = record_history
+        self.checkpoints = checkpoints
+        self.deadline = deadline
+        self.checkpointed = 0
+        self.node_timings: Dict[str, Dict[str, float]] = {}
+        self.profile_stats: Dict[str, List[float]] = {}
+    
+    @property
+    def node_options(self) -> Dict[str, Any]:
+        return {"profile": self.profile, "trace_memory": self.trace_memory, "deadline": self.deadline}
+    
+    def emit(self, event: str, **payload):
+        if self.on_event is not None:
+            self.on_event({"event": event, **payload})
+    
+    def publish(self, entry: Dict[str, Any]):
+        if self.on_event is not None:
+            event = {"event": NODE_EVENTS[entry["status"]], **entry}
+            event.pop("profile", None)
+            event.pop("delta", None)
+            self.on_event(event)
+    
+    def record(self, execution_log: List[Dict], entry: Dict[str, Any], publish: bool = True):
+        for function, (calls, total, cumulative) in entry.pop("profile", {}).items():
+            totals = self.profile_stats.setdefault(function, [0, 0.0, 0.0])
+            totals[0] += calls
+            totals[1] += total
+            totals[2] += cumulative
+        
+        if "duration_ms" in entry:
+            timing = self.node_timings.setdefault(
+                entry["node"], {"calls": 0, "total_ms": 0.0, "cpu_ms": 0.0, "max_ms": 0.0}
+            )
+            timing["calls"] += 1
+            timing["total_ms"] += entry["duration_ms"]
+            timing["cpu_ms"] += entry.get("cpu_time_ms", 0.0)
+            timing["max_ms"] = max(timing["max_ms"], entry["duration_ms"])
+        
+        execution_log.append(entry)
+        if publish:
+            self.publish(entry)
+    
+    def summary(self) -> Dict[str, Any]:
+        summary = {"node_timings": self.node_timings}
+        if self.profile:
+            hottest = sorted(self.profile_stats.items(), key=lambda item: item[1][2], reverse=True)
+            summary["profile"] = [
+                {
+                    "function": function,
+                    "calls": calls,
+                    "total_ms": total * 1000,
+                    "cumulative_ms": cumulative * 1000
+                }
+                for function, (calls, total, cumulative) in hottest[:PROFILE_TOP_FUNCTIONS]
+            ]
+        return summary
+
+def _checkpoint_store(checkpoint: Any):
+    if not checkpoint:
+        return None
+    if checkpoint is True:
+        from app.checkpoints import checkpoint_store
+        return checkpoint_store
+    return checkpoint
+
+def _log_entry(node_name: str, status: str, state: WorkflowState, **extra) -> Dict[str, Any]:
+    entry = {
+        "node": node_name,
+        "status": status,
+        "iteration": state.iteration,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    entry.update(extra)
+    return entry
+
+class CompiledGraph:
+    __slots__ = (
+        "graph_id", "workflow_type", "names", "nodes", "index", "successors",
+        "conditions", "executors", "start", "max_iterations"
+    )
+    
+    def __init__(self, graph_id: str, workflow_type: Optional[str], nodes: List[Node],
+                 edges: Dict[str, Union[str, List[str]]],
+                 conditional_edges: Dict[str, Callable],
+                 conditional_targets: Dict[str, List[str]],
+                 executors: List[Optional[Executor]], start: Optional[str], max_iterations: int):
+        names = tuple(node.name for node in nodes)
+        index = {name: position for position, name in enumerate(names)}
+        
+        def resolve(target: Union[str, List[str], None]) -> Successor:
+            if target is None:
+                return None
+            if isinstance(target, list):
+                return tuple(index[name] for name in target)
+            return index[target]
+        
+        conditions = []
+        for name in names:
+            if name in conditional_edges:
+                targets = conditional_targets.get(name)
+                conditions.append((conditional_edges[name], frozenset(targets) if targets is not None else None))
+            else:
+                conditions.append(None)
+        
+        assign = object.__setattr__
+        assign(self, "graph_id", graph_id)
+        assign(self, "workflow_type", workflow_type)
+        assign(self, "names", names)
+        assign(self, "nodes", tuple(nodes))
+        assign(self, "index", MappingProxyType(index))
+        assign(self, "successors", tuple(resolve(edges.get(name)) for name in names))
+        assign(self, "conditions", tuple(conditions))
+        assign(self, "executors", tuple(executors))
+        assign(self, "start", index[start] if start is not None else None)
+        assign(self, "max_iterations", max_iterations)
+    
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("CompiledGraph is immutable")
+    
+    async def run(self, initial_state: Dict[str, Any], run_id: str = None,
+                  on_event: Callable[[Dict[str, Any]], None] = None, profile: bool = False,
+                  trace_memory: bool = False, record_history: bool = False, checkpoint: Any = False,
+                  resume: Any = False, deadline: float = None, graph_id: str = None) -> tuple[WorkflowState, List[Dict]]:
+        if not run_id:
+            run_id = str(uuid.uuid4())
+        
+        started = time.perf_counter()
+        store = _checkpoint_store(checkpoint or resume)
+        if resume:
+            saved = resume if isinstance(resume, dict) else store.load(run_id)
+            if saved is None:
+                raise LookupError(f"No checkpoint found for run {run_id}")
+            record_history = record_history or saved["header"].get("record_history", False)
+            state, execution_log, position, iterations = self._restore(run_id, saved)
+        else:
+            state = WorkflowState(data=initial_state, metadata={"run_id": run_id})
+            execution_log = []
+            position = self.start
+            iterations = 0
+            if store is not None:
+                store.start(run_id, {
+                    "graph_id": graph_id or self.graph_id,
+                    "initial_state": initial_state,
+                    "record_history": record_history
+                })
+        
+        ctx = RunContext(run_id, on_event, profile, trace_memory, record_history, store,
+                         time.monotonic() + deadline if deadline else None)
+        ctx.checkpointed = len(execution_log)
+        ctx.emit("run_start", run_id=run_id, graph_id=graph_id or self.graph_id)
+        
+        names = self.names
+        nodes = self.nodes
+        executors = self.executors
+        failed = False
+        
+        while position is not None and iterations < self.max_iterations:
+            if isinstance(position, tuple):
+                targets = [names[target] for target in position]
+                try:
+                    position, steps, failed, merged = await self._run_branches(position, state, execution_log, ctx)
+                except Exception as e:
+                    ctx.record(execution_log, _log_entry(",".join(targets), "error", state, error=str(e)))
+                    failed = True
+                    break
+                iterations += steps
+                if failed:
+                    break
+                self._checkpoint(ctx, state, execution_log, merged, position, iterations)
+                continue
+            
+            node = nodes[position]
+            
+            if not node.should_execute(state):
+                ctx.record(execution_log, _log_entry(node.name, "skipped", state))
+                position = self.successors[position]
+                self._checkpoint(ctx, state, execution_log, {}, position, iterations)
+                continue
+            
+            ctx.emit("node_start", node=node.name, iteration=state.iteration)
+            info = {}
+            try:
+                result = await node.invoke(state, executors[position], info, **ctx.node_options)
+                state.update(result)
+                if ctx.record_history:
+                    info["delta"] = result
+                ctx.record(execution_log, _log_entry(node.name, "success", state, **info))
+            except Exception as e:
+                ctx.record(execution_log, _log_entry(node.name, "error", state, error=str(e), **info))
+                failed = True
+                break
+            
+            iterations += 1
+            try:
+                position = self._successor(position, state)
+            except GraphValidationError as e:
+                ctx.record(execution_log, _log_entry(node.name, "error", state, error=str(e)))
+                failed = True
+                break
+            self._checkpoint(ctx, state, execution_log, result, position, iterations)
+        
+        state.metadata["iterations_used"] = iterations
+        state.metadata["completed"] = position is None and not failed
+        if store is not None and state.metadata["completed"]:
+            store.delete(run_id)
+        state.metadata.update(ctx.summary())
+        record_run(self.workflow_type, time.perf_counter() - started, state.metadata["completed"], execution_log)
+        status = "completed" if state.metadata["completed"] else "failed"
+        ctx.emit("run_end", run_id=run_id, status=status, final_state=state.data, metadata=state.metadata)
+        
+        return state, execution_log
+    
+    async def stream(self, initial_state: Dict[str, Any], run_id: str = None,
+                     **options) -> AsyncIterator[Dict[str, Any]]:
+        async for event in stream_events(lambda emit: self.run(initial_state, run_id, on_event=emit, **options)):
+            yield event
+    
+    def _restore(self, run_id: str, saved: Dict[str, Any]):
+        data = dict(saved["header"]["initial_state"])
+        execution_log = []
+        position = self.start
+        iterations = 0
+        iteration = 0
+        for step in saved["steps"]:
+            data.update(step["delta"])
+            execution_log.extend(step["log"])
+            position = self._resolve(step["next"])
+            iterations = step["iterations"]
+            iteration = step["iteration"]
+        
+        metadata = {"run_id": run_id, "resumed_from_step": len(saved["steps"])}
+        return WorkflowState(data=data, metadata=metadata, iteration=iteration), execution_log, position, iterations
+    
+    def _checkpoint(self, ctx: RunContext, state: WorkflowState, execution_log: List[Dict],
+                    delta: Dict[str, Any], position: Successor, iterations: int):
+        if ctx.checkpoints is None:
+            return
+        if isinstance(position, tuple):
+            next_nodes = [self.names[target] for target in position]
+        else:
+            next_nodes = self.names[position] if position is not None else None
+        ctx.checkpoints.append(ctx.run_id, {
+            "delta": delta,
+            "next": next_nodes,
+            "iterations": iterations,
+            "iteration": state.iteration,
+            "log": execution_log[ctx.checkpointed:]
+        })
+        ctx.checkpointed = len(execution_log)
+    
+    def _resolve(self, target: Union[str, List[str], None]) -> Successor:
+        if target is None:
+            return None
+        for name in target if isinstance(target, list) else [target]:
+            if name not in self.index:
+                raise GraphValidationError(f"Unknown node: {name}")
+        if isinstance(target, list):
+            return tuple(self.index[name] for name in target)
+        return self.index[target]
+    
+    def _successor(self, position: int, state: WorkflowState) -> Successor:
+        condition = self.conditions[position]
+        if condition is None:
+            return self.successors[position]
+        
+        func, allowed = condition
+        target = func(state)
+        if target is None:
+            return None
+        targets = target if isinstance(target, (list, tuple)) else [target]
+        for name in targets:
+            if name not in self.index:
+                raise GraphValidationError(f"Unknown node: {name}")
+            if allowed is not None and name not in allowed:
+                raise GraphValidationError(
+                    f"Conditional edge from '{self.names[position]}' returned undeclared target '{name}'"
+                )
+        if isinstance(target, (list, tuple)):
+            return tuple(self.index[name] for name in target)
+        return self.index[target]
+    
+    async def _run_branches(self, targets: Tuple[int, ...], state: WorkflowState, execution_log: List[Dict],
+                            ctx: RunContext):
+        branches = await asyncio.gather(*(
+            self._run_branch(target, state.fork(), ctx) for target in targets
+        ))
+        
+        steps = 0
+        failed = False
+        for branch in branches:
+            for entry in branch["log"]:
+                ctx.record(execution_log, entry, publish=False)
+            steps += branch["steps"]
+            failed = failed or branch["failed"]
+        if failed:
+            return None, steps, True, None
+        
+        names = [self.names[target] for target in targets]
+        joins = {branch["join"] for branch in branches}
+        if len(joins) > 1:
+            raise ValueError(f"Branches {names} do not converge on a single join node")
+        join = joins.pop()
+        
+        policy = self.nodes[join].join if join is not None else "error"
+        merged, owners = self._merge_updates(names, [branch["updates"] for branch in branches], policy)
+        state.update(merged)
+        state.iteration = max(branch["iteration"] for branch in branches)
+        
+        if ctx.record_history:
+            for branch_name, branch in zip(names, branches):
+                for entry, result in branch["deltas"]:
+                    entry["delta"] = {key: value for key, value in result.items() if owners[key] == branch_name}
+        
+        return join, steps, False, merged
+    
+    async def _run_branch(self, start: int, state: WorkflowState, ctx: RunContext) -> Dict[str, Any]:
+        branch = {"updates": {}, "log": [], "deltas": [], "steps": 0, "failed": False, "join": None}
+        branch_name = self.names[start]
+        position = start
+        node_name = branch_name
+        
+        def add(entry: Dict[str, Any]):
+            branch["log"].append(entry)
+            ctx.publish(entry)
+        
+        def fail(message: str, **info):
+            add(_log_entry(node_name, "error", state, branch=branch_name, error=message, **info))
+            branch["failed"] = True
+        
+        while position is not None:
+            if isinstance(position, tuple):
+                fail(f"Nested fan-out from branch '{branch_name}' is not supported")
+                break
+            node = self.nodes[position]
+            node_name = node.name
+            if branch["steps"] >= self.max_iterations:
+                fail("Branch exceeded max_iterations")
+                break
+            
+            if node.join is not None:
+                branch["join"] = position
+                break
+            
+            if not node.should_execute(state):
+                add(_log_entry(node_name, "skipped", state, branch=branch_name))
+                position = self.successors[position]
+                continue
+            
+            ctx.emit("node_start", node=node_name, iteration=state.iteration, branch=branch_name)
+            info = {}
+            try:
+                result = await node.invoke(state, self.executors[position], info, **ctx.node_options)
+            except Exception as e:
+                fail(str(e), **info)
+                break
+            state.update(result)
+            branch["updates"].update(result)
+            entry = _log_entry(node_name, "success", state, branch=branch_name, **info)
+            add(entry)
+            if ctx.record_history:
+                branch["deltas"].append((entry, result))
+            branch["steps"] += 1
+            try:
+                position = self._successor(position, state)
+            except GraphValidationError as e:
+                fail(str(e))
+                break
+        
+        branch["iteration"] = state.iteration
+        return branch
+    
+    def _merge_updates(self, targets: List[str], updates: List[Dict[str, Any]],
+                       policy: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        merged = {}
+        owners = {}
+        for branch_name, branch_updates in zip(targets, updates):
+            for key, value in branch_updates.items():
+                if key in merged:
+                    if policy == "first":
+                        continue
+                    if policy == "error" and merged[key] != value:
+                        raise ValueError(
+                            f"Conflicting updates for '{key}' from branches '{owners[key]}' and '{branch_name}'"
+                        )
+                merged[key] = value
+                owners[key] = branch_name
+        return merged, owners
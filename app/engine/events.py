@@ -0,0 +1,80 @@
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+
+NODE_EVENTS = {"success": "node_end", "skipped": "node_skip", "error": "node_error"}
+
+Emitter = Callable[[Dict[str, Any]], None]
+
+async def stream_events(start: Callable[[Emitter], Awaitable[Any]]) -> AsyncIterator[Dict[str, Any]]:
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.ensure_future(start(queue.put_nowait))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield event
+        task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+
+class EventChannel:
+    def __init__(self, history_limit: int):
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
+        self.subscribers: List[asyncio.Queue] = []
+
+class EventBus:
+    def __init__(self, history_limit: int = 1000):
+        self.history_limit = history_limit
+        self._channels: Dict[str, EventChannel] = {}
+    
+    def open(self, run_id: str):
+        self._channels.setdefault(run_id, EventChannel(self.history_limit))
+    
+    def emitter(self, run_id: str) -> Emitter:
+        self.open(run_id)
+        return lambda event: self.publish(run_id, event)
+    
+    def publish(self, run_id: str, event: Dict[str, Any]):
+        channel = self._channels.get(run_id)
+        if channel is None:
+            return
+        
+        channel.history.append(event)
+        for queue in channel.subscribers:
+            queue.put_nowait(event)
+        
+        if event.get("event") == "run_end":
+            self.close(run_id)
+    
+    def close(self, run_id: str):
+        channel = self._channels.pop(run_id, None)
+        if channel is None:
+            return
+        for queue in channel.subscribers:
+            queue.put_nowait(None)
+    
+    def subscribe(self, run_id: str) -> Optional[asyncio.Queue]:
+        channel = self._channels.get(run_id)
+        if channel is None:
+            return None
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in channel.history:
+            queue.put_nowait(event)
+        channel.subscribers.append(queue)
+        return queue
+    
+    def unsubscribe(self, run_id: str, queue: asyncio.Queue):
+        channel = self._channels.get(run_id)
+        if channel is not None and queue in channel.subscribers:
+            channel.subscribers.remove(queue)
+    
+    def is_open(self, run_id: str) -> bool:
+        return run_id in self._channels
+
+event_bus = EventBus()
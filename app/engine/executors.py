@@ -0,0 +1,137 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+EXECUTOR_TYPES = ("inline", "thread", "process")
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_executors: Dict[str, Executor] = {}
+_killable_pool: Optional["KillablePool"] = None
+_lock = threading.Lock()
+
+def _max_workers(kind: str) -> int:
+    env = os.environ.get(f"WORKFLOW_{kind.upper()}_WORKERS")
+    if env:
+        return int(env)
+    cpus = os.cpu_count() or 1
+    return cpus if kind == "process" else min(32, cpus + 4)
+
+def get_executor(kind: Union[str, Executor, None]) -> Optional[Executor]:
+    if kind is None or kind == "inline":
+        return None
+    if isinstance(kind, Executor):
+        return kind
+    if kind not in EXECUTOR_TYPES:
+        raise ValueError(f"Unknown executor type: {kind}")
+    
+    with _lock:
+        if kind not in _executors:
+            if kind == "thread":
+                _executors[kind] = ThreadPoolExecutor(
+                    max_workers=_max_workers(kind),
+                    thread_name_prefix="workflow-node"
+                )
+            else:
+                _executors[kind] = ProcessPoolExecutor(max_workers=_max_workers(kind))
+        return _executors[kind]
+
+def shutdown_executors(wait: bool = True):
+    global _killable_pool
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+        pool, _killable_pool = _killable_pool, None
+    for executor in executors:
+        executor.shutdown(wait=wait)
+    if pool is not None:
+        pool.shutdown()
+
+
+def _killable_worker(conn):
+    while True:
+        try:
+            func, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            outcome = (True, func(*args))
+        except Exception as e:
+            outcome = (False, e)
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            conn.send((False, RuntimeError(f"Unpicklable result from worker process: {e}")))
+
+class _KillableWorker:
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_killable_worker, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+    
+    async def call(self, func: Callable, args: tuple) -> Any:
+        loop = asyncio.get_running_loop()
+        self.conn.send((func, args))
+        ready = loop.create_future()
+        loop.add_reader(self.conn.fileno(), lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            loop.remove_reader(self.conn.fileno())
+        try:
+            return self.conn.recv()
+        except (EOFError, ConnectionResetError):
+            self.process.join()
+            raise RuntimeError(f"Worker process exited with code {self.process.exitcode}") from None
+    
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class KillablePool:
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._context = multiprocessing.get_context(START_METHOD)
+        if START_METHOD == "forkserver":
+            self._context.set_forkserver_preload(["app.engine.node"])
+        self._idle: List[_KillableWorker] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+    
+    async def run(self, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_workers)
+        
+        async with self._slots:
+            worker = self._idle.pop() if self._idle else _KillableWorker(self._context)
+            try:
+                ok, value = await worker.call(func, args)
+            except BaseException:
+                worker.kill()
+                raise
+            self._idle.append(worker)
+        if not ok:
+            raise value
+        return value
+    
+    def shutdown(self):
+        idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
+
+def get_killable_pool() -> KillablePool:
+    global _killable_pool
+    with _lock:
+        if _killable_pool is None:
+            _killable_pool = KillablePool(_max_workers("process"))
+        return _killable_pool
+
+async def run_killable(func: Callable, *args) -> Any:
+    return await get_killable_pool().run(func, *args)
@@ -1,87 +1,158 @@
-from typing import Dict, List, Callable, Any, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, Dict, List, Callable, Any, Optional, Set, Union
+from app.engine.cache import NodeCache, node_cache
+from app.engine.compiled import CompiledGraph, GraphValidationError
+from app.engine.executors import EXECUTOR_TYPES, get_executor
 from app.engine.node import Node
 from app.engine.state import WorkflowState
 import uuid
-from datetime import datetime
+
+_DYNAMIC = object()
+
+def _targets(target: Union[str, List[str], None]) -> List[str]:
+    if target is None:
+        return []
+    return target if isinstance(target, list) else [target]
 
 class WorkflowGraph:
-    def __init__(self, graph_id: str = None):
+    def __init__(self, graph_id: str = None, executor: Union[str, Executor] = "thread"):
         self.graph_id = graph_id or str(uuid.uuid4())
+        self.workflow_type: Optional[str] = None
+        self.config: Dict[str, Any] = {}
+        self.set_executor(executor)
         self.nodes: Dict[str, Node] = {}
-        self.edges: Dict[str, str] = {}
+        self.edges: Dict[str, Union[str, List[str]]] = {}
         self.conditional_edges: Dict[str, Callable] = {}
+        self.conditional_targets: Dict[str, List[str]] = {}
         self.start_node: Optional[str] = None
         self.max_iterations = 50
+        self.cache: NodeCache = node_cache
+    
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name != "_plan":
+            super().__setattr__("_plan", None)
     
-    def add_node(self, name: str, func: Callable, condition: Callable = None):
-        self.nodes[name] = Node(name, func, condition)
+    def add_node(self, name: str, func: Callable, condition: Callable = None, kind: str = None,
+                 join: str = None, inputs: List[str] = None, cached: bool = False, timeout: float = None,
+                 retries: int = 0, backoff: float = 0.0):
+        cache = self.cache if cached else None
+        self.nodes[name] = Node(name, func, condition, kind, join, inputs, cache, timeout, retries, backoff)
+        self._plan = None
         if not self.start_node:
             self.start_node = name
     
-    def add_edge(self, from_node: str, to_node: str):
+    def add_join(self, name: str, func: Callable = None, conflict: str = "error", kind: str = None, **policy):
+        self.add_node(name, func, kind=kind, join=conflict, **policy)
+    
+    def add_edge(self, from_node: str, to_node: Union[str, List[str]]):
+        if isinstance(to_node, (list, tuple)):
+            to_node = list(to_node)
         self.edges[from_node] = to_node
+        self._plan = None
     
-    def add_conditional_edge(self, from_node: str, condition_func: Callable):
+    def add_conditional_edge(self, from_node: str, condition_func: Callable, targets: List[str] = None):
         self.conditional_edges[from_node] = condition_func
+        if targets is not None:
+            self.conditional_targets[from_node] = list(targets)
+        else:
+            self.conditional_targets.pop(from_node, None)
+        self._plan = None
     
     def set_start(self, node_name: str):
         self.start_node = node_name
     
-    async def run(self, initial_state: Dict[str, Any], run_id: str = None) -> tuple[WorkflowState, List[Dict]]:
-        if not run_id:
-            run_id = str(uuid.uuid4())
-            
-        state = WorkflowState(data=initial_state, metadata={"run_id": run_id})
-        execution_log = []
-        
-        current_node_name = self.start_node
-        iterations = 0
+    def set_executor(self, executor: Union[str, Executor]):
+        if not isinstance(executor, Executor) and executor not in EXECUTOR_TYPES:
+            raise ValueError(f"Unknown executor type: {executor}")
+        self.executor = executor
+    
+    def _executor_for(self, node: Node) -> Optional[Executor]:
+        if node.kind == "cpu":
+            return get_executor(self.executor)
+        if node.kind == "io":
+            executor = get_executor(self.executor)
+            if isinstance(executor, ProcessPoolExecutor):
+                return get_executor("thread")
+            return executor
+        return None
+    
+    def compile(self) -> CompiledGraph:
+        if self._plan is None:
+            self._validate()
+            nodes = list(self.nodes.values())
+            self._plan = CompiledGraph(
+                self.graph_id, self.workflow_type, nodes, self.edges, self.conditional_edges,
+                self.conditional_targets, [self._executor_for(node) for node in nodes],
+                self.start_node, self.max_iterations
+            )
+        return self._plan
+    
+    async def run(self, initial_state: Dict[str, Any], run_id: str = None,
+                  **options) -> tuple[WorkflowState, List[Dict]]:
+        return await self.compile().run(initial_state, run_id, **options)
+    
+    async def stream(self, initial_state: Dict[str, Any], run_id: str = None,
+                     **options) -> AsyncIterator[Dict[str, Any]]:
+        async for event in self.compile().stream(initial_state, run_id, **options):
+            yield event
+    
+    def _validate(self):
+        if not self.nodes:
+            if self.start_node is not None:
+                raise GraphValidationError(f"Start node '{self.start_node}' is not defined")
+            return
+        if self.start_node not in self.nodes:
+            raise GraphValidationError(f"Start node '{self.start_node}' is not defined")
         
-        while current_node_name and iterations < self.max_iterations:
-            if current_node_name not in self.nodes:
-                break
-                
-            node = self.nodes[current_node_name]
-            
-            if not node.should_execute(state):
-                execution_log.append({
-                    "node": current_node_name,
-                    "status": "skipped",
-                    "iteration": state.iteration,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-                current_node_name = self.edges.get(current_node_name)
-                continue
-            
-            try:
-                state = await node.execute(state)
-                execution_log.append({
-                    "node": current_node_name,
-                    "status": "success",
-                    "iteration": state.iteration,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-            except Exception as e:
-                execution_log.append({
-                    "node": current_node_name,
-                    "status": "error",
-                    "error": str(e),
-                    "iteration": state.iteration,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-                break
-            
-            if current_node_name in self.conditional_edges:
-                next_node = self.conditional_edges[current_node_name](state)
-                current_node_name = next_node
-            elif current_node_name in self.edges:
-                current_node_name = self.edges[current_node_name]
-            else:
-                current_node_name = None
-            
-            iterations += 1
+        for source, target in list(self.edges.items()) + list(self.conditional_targets.items()):
+            if source not in self.nodes:
+                raise GraphValidationError(f"Edge from unknown node '{source}'")
+            if isinstance(target, list) and not target:
+                raise GraphValidationError(f"Edge from '{source}' has no targets")
+            for name in _targets(target):
+                if name not in self.nodes:
+                    raise GraphValidationError(f"Edge '{source}' -> '{name}' points to unknown node")
+        for source in self.conditional_edges:
+            if source not in self.nodes:
+                raise GraphValidationError(f"Conditional edge from unknown node '{source}'")
         
-        state.metadata["iterations_used"] = iterations
-        state.metadata["completed"] = current_node_name is None
+        for source, target in self.edges.items():
+            if isinstance(target, list):
+                joins = {self._branch_join(name) for name in target} - {_DYNAMIC}
+                if len(joins) > 1:
+                    raise GraphValidationError(f"Branches from '{source}' do not converge on a single join node")
         
-        return state, execution_log
+        unreachable = set(self.nodes) - self._reachable()
+        if unreachable:
+            raise GraphValidationError(f"Unreachable nodes: {', '.join(sorted(unreachable))}")
+    
+    def _branch_join(self, name: Optional[str]) -> Any:
+        branch = name
+        seen: Set[str] = set()
+        while name is not None:
+            if name in seen or name in self.conditional_edges:
+                return _DYNAMIC
+            if self.nodes[name].join is not None:
+                return name
+            seen.add(name)
+            name = self.edges.get(name)
+            if isinstance(name, list):
+                raise GraphValidationError(f"Nested fan-out from branch '{branch}' is not supported")
+        return None
+    
+    def _reachable(self) -> Set[str]:
+        reached = {self.start_node}
+        pending = [self.start_node]
+        while pending:
+            name = pending.pop()
+            successors = _targets(self.edges.get(name))
+            if name in self.conditional_edges:
+                if name not in self.conditional_targets:
+                    return set(self.nodes)
+                successors = successors + self.conditional_targets[name]
+            for successor in successors:
+                if successor not in reached:
+                    reached.add(successor)
+                    pending.append(successor)
+        return reached
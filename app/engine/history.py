@@ -0,0 +1,23 @@
+from typing import Any, Dict, List
+
+def state_at(initial_state: Dict[str, Any], execution_log: List[Dict[str, Any]], step: int) -> Dict[str, Any]:
+    if step < 0 or step > len(execution_log):
+        raise IndexError(f"Step {step} is out of range 0..{len(execution_log)}")
+    
+    data = dict(initial_state)
+    for entry in execution_log[:step]:
+        delta = entry.get("delta")
+        if delta:
+            data.update(delta)
+    return data
+
+def history_steps(execution_log: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "step": step,
+            "node": entry["node"],
+            "status": entry["status"],
+            "changed": sorted(entry.get("delta") or {})
+        }
+        for step, entry in enumerate(execution_log, start=1)
+    ]
@@ -1,15 +1,211 @@
-from typing import Callable, Any
+import asyncio
+import cProfile
+import inspect
+import pstats
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Any, Dict, List, Optional, Set, Tuple
+from app.engine.cache import NodeCache
+from app.engine.executors import run_killable
 from app.engine.state import WorkflowState
 
+NODE_KINDS = ("inline", "cpu", "io", "async")
+JOIN_POLICIES = ("error", "first", "last")
+
+class NodeTimeoutError(TimeoutError):
+    pass
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+def _profile_stats(profiler: cProfile.Profile) -> Dict[str, List[float]]:
+    stats = {}
+    for (filename, lineno, name), (_, calls, total, cumulative, _) in pstats.Stats(profiler).stats.items():
+        stats[f"{filename}:{lineno}({name})"] = [calls, total, cumulative]
+    return stats
+
+class _MemoryTrace:
+    def __init__(self, baseline: int):
+        self.baseline = baseline
+        self.shared = False
+
+_trace_lock = threading.Lock()
+_active_traces: Set[_MemoryTrace] = set()
+_owns_tracing = False
+
+def _begin_trace() -> _MemoryTrace:
+    global _owns_tracing
+    with _trace_lock:
+        if not _active_traces:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _owns_tracing = True
+            tracemalloc.reset_peak()
+        trace = _MemoryTrace(tracemalloc.get_traced_memory()[0])
+        if _active_traces:
+            trace.shared = True
+            for other in _active_traces:
+                other.shared = True
+        _active_traces.add(trace)
+    return trace
+
+def _end_trace(trace: _MemoryTrace) -> Dict[str, float]:
+    global _owns_tracing
+    with _trace_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        _active_traces.discard(trace)
+        if not _active_traces and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+    if trace.shared:
+        return {"process_memory_peak_kb": peak / 1024}
+    return {"memory_peak_kb": (peak - trace.baseline) / 1024}
+
+def call_measured(func: Callable, state: WorkflowState, profile: bool = False,
+                  trace_memory: bool = False) -> Tuple[Any, Dict[str, Any]]:
+    measurements = {}
+    trace = _begin_trace() if trace_memory else None
+    
+    profiler = cProfile.Profile() if profile else None
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError:
+            profiler = None
+    cpu_start = time.thread_time()
+    try:
+        result = func(state)
+    finally:
+        measurements["cpu_time_ms"] = (time.thread_time() - cpu_start) * 1000
+        if profiler is not None:
+            profiler.disable()
+        if trace is not None:
+            measurements.update(_end_trace(trace))
+    
+    if profiler is not None:
+        measurements["profile"] = _profile_stats(profiler)
+    return result, measurements
+
 class Node:
-    def __init__(self, name: str, func: Callable, condition: Callable = None):
+    def __init__(self, name: str, func: Callable, condition: Callable = None, kind: str = None,
+                 join: str = None, inputs: List[str] = None, cache: NodeCache = None,
+                 timeout: float = None, retries: int = 0, backoff: float = 0.0):
+        if kind is None:
+            kind = "async" if inspect.iscoroutinefunction(func) else "inline"
+        if kind not in NODE_KINDS:
+            raise ValueError(f"Unknown node kind: {kind}")
+        if join is not None and join not in JOIN_POLICIES:
+            raise ValueError(f"Unknown join policy: {join}")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("Node timeout must be positive")
+        if retries < 0 or backoff < 0:
+            raise ValueError("Node retries and backoff must not be negative")
+        
         self.name = name
         self.func = func
         self.condition = condition
+        self.kind = kind
+        self.join = join
+        self.inputs = list(inputs) if inputs is not None else None
+        self.cache = cache if self.inputs is not None else None
+        self.cache_scope = f"{name}:{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+    
+    async def invoke(self, state: WorkflowState, executor: Optional[Executor] = None,
+                     info: Dict[str, Any] = None, profile: bool = False,
+                     trace_memory: bool = False, deadline: float = None) -> Dict[str, Any]:
+        info = {} if info is None else info
+        info["started_at"] = time.monotonic()
+        start = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                timeout = self._attempt_timeout(deadline)
+                scope = asyncio.timeout(timeout)
+                try:
+                    async with scope:
+                        return await self._invoke(
+                            state, executor, info, profile, trace_memory, killable=timeout is not None
+                        )
+                except Exception as e:
+                    failure = e
+                    if scope.expired():
+                        if deadline is not None and time.monotonic() >= deadline:
+                            raise DeadlineExceededError("Run deadline exceeded") from None
+                        failure = NodeTimeoutError(f"Node '{self.name}' timed out after {self.timeout}s")
+                        if self._runs_in_thread(executor):
+                            raise failure
+                    if attempt > self.retries:
+                        raise failure
+                
+                delay = self.backoff * 2 ** (attempt - 1)
+                if deadline is not None:
+                    delay = min(delay, max(deadline - time.monotonic(), 0))
+                await asyncio.sleep(delay)
+        finally:
+            if self.retries:
+                info["attempts"] = attempt
+            info["duration_ms"] = (time.perf_counter() - start) * 1000
+            info["ended_at"] = time.monotonic()
+    
+    def _attempt_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError("Run deadline exceeded")
+        return remaining if self.timeout is None else min(self.timeout, remaining)
+    
+    def _runs_in_thread(self, executor: Optional[Executor]) -> bool:
+        return self.kind in ("cpu", "io") and executor is not None and not isinstance(executor, ProcessPoolExecutor)
+    
+    async def _invoke(self, state: WorkflowState, executor: Optional[Executor], info: Dict[str, Any],
+                      profile: bool, trace_memory: bool, killable: bool = False) -> Dict[str, Any]:
+        if self.func is None:
+            return {}
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.cache_scope, state.data, self.inputs)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                info["cached"] = True
+                return cached
+        
+        if self.kind == "async":
+            cpu_start = time.thread_time()
+            result = await self.func(state)
+            info["cpu_time_ms"] = (time.thread_time() - cpu_start) * 1000
+        else:
+            if self.kind in ("cpu", "io") and killable and isinstance(executor, ProcessPoolExecutor):
+                result, measurements = await run_killable(call_measured, self.func, state, profile, trace_memory)
+            elif self.kind in ("cpu", "io") and executor is not None:
+                loop = asyncio.get_running_loop()
+                result, measurements = await loop.run_in_executor(
+                    executor, call_measured, self.func, state, profile, trace_memory
+                )
+            else:
+                result, measurements = call_measured(self.func, state, profile, trace_memory)
+            info.update(measurements)
+        
+        if inspect.isawaitable(result):
+            result = await result
+        
+        if not result or not isinstance(result, dict):
+            result = {}
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
     
-    async def execute(self, state: WorkflowState) -> WorkflowState:
-        result = self.func(state)
-        if result and isinstance(result, dict):
+    async def execute(self, state: WorkflowState, executor: Optional[Executor] = None,
+                      info: Dict[str, Any] = None, **options) -> WorkflowState:
+        result = await self.invoke(state, executor, info, **options)
+        if result:
             state.update(result)
         return state
     
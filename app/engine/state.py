@@ -1,15 +1,16 @@
 from typing import Any, Dict
-from pydantic import BaseModel
-from datetime import datetime
 
-class WorkflowState(BaseModel):
-    data: Dict[str, Any] = {}
-    metadata: Dict[str, Any] = {}
-    iteration: int = 0
+class WorkflowState:
+    __slots__ = ("data", "metadata", "iteration")
+    
+    def __init__(self, data: Dict[str, Any] = None, metadata: Dict[str, Any] = None, iteration: int = 0):
+        self.data = dict(data) if data else {}
+        self.metadata = dict(metadata) if metadata else {}
+        self.iteration = iteration
+    
+    def __repr__(self) -> str:
+        return f"WorkflowState(data={self.data!r}, metadata={self.metadata!r}, iteration={self.iteration})"
     
-    class Config:
-        arbitrary_types_allowed = True
-
     def get(self, key: str, default=None):
         return self.data.get(key, default)
     
@@ -18,3 +19,10 @@ class WorkflowState(BaseModel):
     
     def update(self, updates: Dict[str, Any]):
         self.data.update(updates)
+    
+    def fork(self) -> "WorkflowState":
+        state = WorkflowState.__new__(WorkflowState)
+        state.data = dict(self.data)
+        state.metadata = self.metadata
+        state.iteration = self.iteration
+        return state
@@ -0,0 +1,17 @@
+import os
+from app.jobs.base import Handler, Job, JobQueue, QueueFullError
+from app.jobs.local import LocalJobQueue
+from app.jobs.process import ProcessJobQueue
+
+def create_job_queue(handler: Handler, kind: str = None, workers: int = None, maxsize: int = None) -> JobQueue:
+    kind = kind or os.environ.get("WORKFLOW_QUEUE", "local")
+    workers = workers or int(os.environ.get("WORKFLOW_QUEUE_WORKERS", 4))
+    maxsize = maxsize or int(os.environ.get("WORKFLOW_QUEUE_SIZE", 1000))
+    
+    if kind == "local":
+        return LocalJobQueue(handler, workers=workers, maxsize=maxsize)
+    if kind == "process":
+        return ProcessJobQueue(handler, workers=workers, maxsize=maxsize)
+    raise ValueError(f"Unknown job queue: {kind}")
+
+__all__ = ["Job", "JobQueue", "LocalJobQueue", "ProcessJobQueue", "QueueFullError", "create_job_queue"]
@@ -0,0 +1,158 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    pass
+
+class Job:
+    def __init__(self, run_id: str, graph_id: str, initial_state: Dict[str, Any], priority: int = 0,
+                 options: Dict[str, Any] = None):
+        self.run_id = run_id
+        self.graph_id = graph_id
+        self.initial_state = initial_state
+        self.priority = priority
+        self.options = options or {}
+        self.enqueued_at = time.monotonic()
+        self.cancelled = False
+
+class LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+    
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_seconds": self.total / self.count if self.count else 0.0,
+            "max_seconds": self.max
+        }
+
+Handler = Callable[..., Awaitable[Any]]
+
+class JobQueue:
+    kind: str = None
+    
+    def __init__(self, handler: Handler, workers: int = 4, maxsize: int = 1000):
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.running = 0
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "cancelled": 0}
+        self.wait_latency = LatencyStats()
+        self.run_latency = LatencyStats()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Dict[str, Job] = {}
+        self._active: Dict[str, asyncio.Task] = {}
+        self._sequence = itertools.count()
+    
+    def submit(self, job: Job):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((job.priority, next(self._sequence), job))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise QueueFullError(f"Job queue is full ({self.maxsize} jobs waiting)")
+        self._pending[job.run_id] = job
+        self.counters["submitted"] += 1
+    
+    async def cancel(self, run_id: str) -> Optional[str]:
+        job = self._pending.pop(run_id, None)
+        if job is not None:
+            job.cancelled = True
+            self.counters["cancelled"] += 1
+            return "queued"
+        
+        task = self._active.get(run_id)
+        if task is None:
+            return None
+        task.cancel()
+        await asyncio.wait({task})
+        return "running"
+    
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+    
+    async def run_graph(self, graph, initial_state: Dict[str, Any], run_id: str, on_event=None, **options):
+        return await graph.run(initial_state, run_id, on_event=on_event, **options)
+    
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        if tasks and self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+        self._queue = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "maxsize": self.maxsize,
+            "depth": self.depth(),
+            "running": self.running,
+            **self.counters,
+            "wait_latency": self.wait_latency.to_dict(),
+            "run_latency": self.run_latency.to_dict()
+        }
+    
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._queue is not None and self._queue.qsize():
+            logger.warning("Dropping %d jobs queued on a closed event loop", self._queue.qsize())
+        
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue(maxsize=self.maxsize)
+        self._pending = {}
+        self._active = {}
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def _worker(self):
+        queue = self._queue
+        while True:
+            _, _, job = await queue.get()
+            if job.cancelled:
+                queue.task_done()
+                continue
+            self._pending.pop(job.run_id, None)
+            
+            started = time.monotonic()
+            self.wait_latency.observe(started - job.enqueued_at)
+            self.running += 1
+            task = asyncio.ensure_future(
+                self.handler(job.graph_id, job.initial_state, job.run_id, self.run_graph, options=job.options)
+            )
+            self._active[job.run_id] = task
+            try:
+                try:
+                    await asyncio.wait({task})
+                except asyncio.CancelledError:
+                    task.cancel()
+                    raise
+                if task.cancelled():
+                    self.counters["cancelled"] += 1
+                elif task.exception() is not None:
+                    self.counters["failed"] += 1
+                    logger.error("Job %s failed", job.run_id, exc_info=task.exception())
+                else:
+                    self.counters["completed"] += 1
+            finally:
+                self._active.pop(job.run_id, None)
+                self.running -= 1
+                self.run_latency.observe(time.monotonic() - started)
+                queue.task_done()
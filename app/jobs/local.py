@@ -0,0 +1,4 @@
+from app.jobs.base import JobQueue
+
+class LocalJobQueue(JobQueue):
+    kind = "local"
@@ -0,0 +1,56 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from app.engine.executors import KillablePool
+from app.engine.state import WorkflowState
+from app.jobs.base import JobQueue
+from app.metrics import record_run
+
+_worker_graphs: Dict[str, Any] = {}
+
+def _run_graph_in_process(workflow_type: str, config: Dict[str, Any], graph_id: str,
+                          initial_state: Dict[str, Any], run_id: str, options: Dict[str, Any]):
+    from app.workflows.templates import graph_templates, template_key
+    
+    config = {**config, "executor": "inline"}
+    key = template_key(workflow_type, config)
+    graph = _worker_graphs.get(key)
+    if graph is None:
+        graph = _worker_graphs[key] = graph_templates.acquire(workflow_type, graph_id, config)
+    state, execution_log = asyncio.run(graph.compile().run(initial_state, run_id, graph_id=graph_id, **options))
+    return state.data, state.metadata, state.iteration, execution_log
+
+class ProcessJobQueue(JobQueue):
+    kind = "process"
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool: Optional[KillablePool] = None
+    
+    async def run_graph(self, graph, initial_state: Dict[str, Any], run_id: str, on_event=None, **options):
+        if not getattr(graph, "workflow_type", None):
+            return await super().run_graph(graph, initial_state, run_id, on_event, **options)
+        
+        if self._pool is None:
+            self._pool = KillablePool(self.workers)
+        if on_event is not None:
+            on_event({"event": "run_start", "run_id": run_id, "graph_id": graph.graph_id})
+        
+        started = time.perf_counter()
+        data, metadata, iteration, execution_log = await self._pool.run(
+            _run_graph_in_process, graph.workflow_type, graph.config, graph.graph_id, initial_state, run_id, options
+        )
+        
+        state = WorkflowState(data=data, metadata=metadata, iteration=iteration)
+        record_run(graph.workflow_type, time.perf_counter() - started, metadata.get("completed", False), execution_log)
+        if on_event is not None:
+            status = "completed" if metadata.get("completed", False) else "failed"
+            on_event({"event": "run_end", "run_id": run_id, "status": status,
+                      "final_state": state.data, "metadata": state.metadata})
+        return state, execution_log
+    
+    async def stop(self):
+        await super().stop()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -1,6 +1,11 @@
 from fastapi import FastAPI, Request
-from app.api.routes import router
+from fastapi.responses import PlainTextResponse
+from app.api.routes import router, job_queue
+from app.metrics import metrics, http_requests, http_request_duration
+import json
 import logging
+import os
+import random
 import time
 
 logging.basicConfig(
@@ -9,23 +14,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+ACCESS_LOG = os.environ.get("WORKFLOW_ACCESS_LOG", "text")
+ACCESS_LOG_SAMPLE_RATE = float(os.environ.get("WORKFLOW_ACCESS_LOG_SAMPLE_RATE", 1.0))
+
 app = FastAPI(title="Workflow Engine", version="1.0.0")
 
+def _should_log() -> bool:
+    if ACCESS_LOG == "off" or not logger.isEnabledFor(logging.INFO):
+        return False
+    return ACCESS_LOG_SAMPLE_RATE >= 1.0 or random.random() < ACCESS_LOG_SAMPLE_RATE
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
+    start_time = time.perf_counter()
+    log = _should_log()
     
-    logger.info(f"→ {request.method} {request.url.path}")
+    if log and ACCESS_LOG == "text":
+        logger.info("→ %s %s", request.method, request.url.path)
     
     response = await call_next(request)
     
-    duration = time.time() - start_time
-    logger.info(f"← {request.method} {request.url.path} - {response.status_code} ({duration:.3f}s)")
+    duration = time.perf_counter() - start_time
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    http_requests.inc(method=request.method, route=route_path, status=response.status_code)
+    http_request_duration.observe(duration, method=request.method, route=route_path)
+    
+    if log:
+        if ACCESS_LOG == "json":
+            logger.info(json.dumps({
+                "method": request.method,
+                "path": request.url.path,
+                "route": route_path,
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 3)
+            }))
+        else:
+            logger.info("← %s %s - %s (%.3fs)", request.method, request.url.path, response.status_code, duration)
     
     return response
 
 app.include_router(router)
+app.add_event_handler("shutdown", job_queue.stop)
 
 @app.get("/")
 def root():
     return {"status": "running", "service": "workflow-engine"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
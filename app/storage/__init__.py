@@ -0,0 +1,19 @@
+import os
+from app.storage.base import StorageBackend
+from app.storage.memory import InMemoryStorage
+from app.storage.sqlite import SQLiteStorage
+
+def create_storage(url: str = None) -> StorageBackend:
+    url = url or os.environ.get("WORKFLOW_STORAGE", "memory")
+    if url == "memory":
+        return InMemoryStorage()
+    if url.startswith("sqlite:"):
+        path = url[len("sqlite:"):]
+        if path.startswith("///"):
+            path = path[3:]
+        return SQLiteStorage(path or "workflow.db")
+    raise ValueError(f"Unknown storage backend: {url}")
+
+storage = create_storage()
+
+__all__ = ["StorageBackend", "InMemoryStorage", "SQLiteStorage", "create_storage", "storage"]
@@ -0,0 +1,59 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+Page = Tuple[List[str], Optional[str]]
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def add_graph(self, graph_id: str, graph: Any):
+        pass
+    
+    @abstractmethod
+    def get_graph(self, graph_id: str) -> Optional[Any]:
+        pass
+    
+    @abstractmethod
+    def list_graphs(self) -> List[str]:
+        pass
+    
+    @abstractmethod
+    def list_graphs_page(self, limit: int, cursor: str = None, order: str = "asc", workflow_type: str = None,
+                         created_after: float = None, created_before: float = None) -> Page:
+        pass
+    
+    @abstractmethod
+    def remove_graph(self, graph_id: str) -> bool:
+        pass
+    
+    @abstractmethod
+    def add_run(self, run_id: str, run_data: Dict):
+        pass
+    
+    @abstractmethod
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        pass
+    
+    @abstractmethod
+    def list_runs(self) -> List[str]:
+        pass
+    
+    @abstractmethod
+    def list_runs_page(self, limit: int, cursor: str = None, order: str = "asc", status: str = None,
+                       graph_id: str = None, created_after: float = None, created_before: float = None) -> Page:
+        pass
+    
+    @abstractmethod
+    def clear(self):
+        pass
+    
+    @abstractmethod
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        pass
+    
+    def close(self):
+        pass
+    
+    def _release_graph(self, graph: Any):
+        release = getattr(graph, "release", None)
+        if release is not None:
+            release()
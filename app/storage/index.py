@@ -0,0 +1,137 @@
+import bisect
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+Entry = Tuple[int, float, str]
+Key = Tuple[str, Any]
+
+ALL: Key = ("all", None)
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+class CreationIndex:
+    def __init__(self, fields: Tuple[str, ...] = ()):
+        self.fields = fields
+        self._sequence = itertools.count()
+        self._last_created = 0.0
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        self._attrs: Dict[str, Dict[str, Any]] = {}
+        self._lists: Dict[Key, List[Entry]] = {ALL: []}
+        self._live: Dict[Key, int] = {ALL: 0}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def add(self, item_id: str, **attrs):
+        entry = self._entries.get(item_id)
+        if entry is None:
+            created = self._last_created = max(time.time(), self._last_created)
+            entry = self._entries[item_id] = (next(self._sequence), created)
+            self._attrs[item_id] = {}
+            self._append(ALL, entry, item_id)
+        
+        current = self._attrs[item_id]
+        for name in self.fields:
+            value = attrs.get(name)
+            if name in current and current[name] == value:
+                continue
+            if name in current:
+                self._release((name, current[name]))
+            current[name] = value
+            self._append((name, value), entry, item_id)
+    
+    def remove(self, item_id: str):
+        if self._entries.pop(item_id, None) is None:
+            return
+        self._live[ALL] -= 1
+        for name, value in self._attrs.pop(item_id).items():
+            self._release((name, value))
+    
+    def clear(self):
+        self._entries.clear()
+        self._attrs.clear()
+        self._lists = {ALL: []}
+        self._live = {ALL: 0}
+    
+    def created_at(self, item_id: str) -> Optional[float]:
+        entry = self._entries.get(item_id)
+        return entry[1] if entry else None
+    
+    def page(self, limit: int, cursor: Optional[str] = None, order: str = "asc", created_after: float = None,
+             created_before: float = None, **filters) -> Tuple[List[str], Optional[str]]:
+        position = parse_cursor(cursor)
+        filters = {name: value for name, value in filters.items() if value is not None}
+        key = min(
+            ((name, value) for name, value in filters.items()),
+            key=lambda key: self._live.get(key, 0),
+            default=ALL
+        )
+        entries = self._lists.get(key, [])
+        descending = order == "desc"
+        
+        if descending:
+            end = len(entries)
+            if position is not None:
+                end = bisect.bisect_left(entries, position, key=lambda entry: entry[0])
+            if created_before is not None:
+                end = min(end, bisect.bisect_left(entries, created_before, key=lambda entry: entry[1]))
+            indices = range(end - 1, -1, -1)
+        else:
+            start = 0
+            if position is not None:
+                start = bisect.bisect_right(entries, position, key=lambda entry: entry[0])
+            if created_after is not None:
+                start = max(start, bisect.bisect_right(entries, created_after, key=lambda entry: entry[1]))
+            indices = range(start, len(entries))
+        
+        items: List[str] = []
+        last = None
+        for index in indices:
+            sequence, created, item_id = entries[index]
+            if created_after is not None and created <= created_after:
+                break
+            if created_before is not None and created >= created_before:
+                if descending:
+                    continue
+                break
+            if not self._matches(item_id, sequence, key, filters):
+                continue
+            if len(items) == limit:
+                return items, str(last)
+            items.append(item_id)
+            last = sequence
+        return items, None
+    
+    def _matches(self, item_id: str, sequence: int, key: Key, filters: Dict[str, Any]) -> bool:
+        entry = self._entries.get(item_id)
+        if entry is None or entry[0] != sequence:
+            return False
+        attrs = self._attrs[item_id]
+        if key != ALL and attrs.get(key[0]) != key[1]:
+            return False
+        return all(attrs.get(name) == value for name, value in filters.items())
+    
+    def _release(self, key: Key):
+        self._live[key] -= 1
+        if not self._live[key]:
+            del self._live[key]
+            del self._lists[key]
+    
+    def _append(self, key: Key, entry: Tuple[int, float], item_id: str):
+        entries = self._lists.setdefault(key, [])
+        live = self._live[key] = self._live.get(key, 0) + 1
+        item = (entry[0], entry[1], item_id)
+        position = bisect.bisect_left(entries, item)
+        if position == len(entries) or entries[position] != item:
+            entries.insert(position, item)
+        if len(entries) > 2 * live + 64:
+            self._lists[key] = [
+                item for item in entries if self._matches(item[2], item[0], key, {})
+            ]
@@ -0,0 +1,201 @@
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from app.engine.cache import estimate_size
+from app.storage.base import Page, StorageBackend
+from app.storage.index import CreationIndex
+
+def _env_limit(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    value = float(value)
+    return value if value > 0 else None
+
+class InMemoryStorage(StorageBackend):
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.graphs = OrderedDict()
+            cls._instance.runs = OrderedDict()
+            cls._instance._graph_touched = {}
+            cls._instance._run_touched = {}
+            cls._instance._run_sizes = {}
+            cls._instance._run_bytes = 0
+            cls._instance._graph_index = CreationIndex(("workflow_type",))
+            cls._instance._run_index = CreationIndex(("status", "graph_id"))
+            cls._instance._lock = threading.RLock()
+            cls._instance.evictions = {
+                "graphs": {"capacity": 0, "ttl": 0},
+                "runs": {"capacity": 0, "bytes": 0, "ttl": 0}
+            }
+            cls._instance.configure(
+                max_graphs=_env_limit("WORKFLOW_MAX_GRAPHS", 1000),
+                max_runs=_env_limit("WORKFLOW_MAX_RUNS", 10000),
+                max_bytes=_env_limit("WORKFLOW_MAX_RUN_BYTES", 256 * 1024 * 1024),
+                ttl_seconds=_env_limit("WORKFLOW_TTL_SECONDS", 3600)
+            )
+        return cls._instance
+    
+    def configure(self, max_graphs: int = None, max_runs: int = None, max_bytes: int = None,
+                  ttl_seconds: float = None):
+        with self._lock:
+            self.max_graphs = int(max_graphs) if max_graphs else None
+            self.max_runs = int(max_runs) if max_runs else None
+            self.max_bytes = int(max_bytes) if max_bytes else None
+            self.ttl_seconds = ttl_seconds
+            self._evict(time.monotonic())
+    
+    def add_graph(self, graph_id: str, graph: Any):
+        with self._lock:
+            now = time.monotonic()
+            previous = self.graphs.get(graph_id)
+            if previous is not None and previous is not graph:
+                self._release_graph(previous)
+            self.graphs[graph_id] = graph
+            self.graphs.move_to_end(graph_id)
+            self._graph_touched[graph_id] = now
+            self._graph_index.add(graph_id, workflow_type=getattr(graph, "workflow_type", None))
+            self._evict(now)
+    
+    def get_graph(self, graph_id: str):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            graph = self.graphs.get(graph_id)
+            if graph is not None:
+                self.graphs.move_to_end(graph_id)
+                self._graph_touched[graph_id] = now
+            return graph
+    
+    def list_graphs(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            return list(self.graphs.keys())
+    
+    def list_graphs_page(self, limit: int, cursor: str = None, order: str = "asc", workflow_type: str = None,
+                         created_after: float = None, created_before: float = None) -> Page:
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._graph_index.page(limit, cursor, order, created_after, created_before,
+                                          workflow_type=workflow_type)
+    
+    def remove_graph(self, graph_id: str) -> bool:
+        with self._lock:
+            graph = self.graphs.pop(graph_id, None)
+            self._graph_touched.pop(graph_id, None)
+            self._graph_index.remove(graph_id)
+        if graph is None:
+            return False
+        self._release_graph(graph)
+        return True
+    
+    def add_run(self, run_id: str, run_data: Dict):
+        size = estimate_size(run_data)
+        with self._lock:
+            now = time.monotonic()
+            self._run_bytes += size - self._run_sizes.get(run_id, 0)
+            self.runs[run_id] = run_data
+            self.runs.move_to_end(run_id)
+            self._run_sizes[run_id] = size
+            self._run_touched[run_id] = now
+            self._run_index.add(run_id, status=run_data.get("status", "completed"), graph_id=run_data.get("graph_id"))
+            self._evict(now)
+    
+    def get_run(self, run_id: str):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            run_data = self.runs.get(run_id)
+            if run_data is not None:
+                self.runs.move_to_end(run_id)
+                self._run_touched[run_id] = now
+            return run_data
+    
+    def list_runs(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            return list(self.runs.keys())
+    
+    def list_runs_page(self, limit: int, cursor: str = None, order: str = "asc", status: str = None,
+                       graph_id: str = None, created_after: float = None, created_before: float = None) -> Page:
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._run_index.page(limit, cursor, order, created_after, created_before,
+                                        status=status, graph_id=graph_id)
+    
+    def clear(self):
+        with self._lock:
+            for graph in self.graphs.values():
+                self._release_graph(graph)
+            self.graphs.clear()
+            self.runs.clear()
+            self._graph_touched.clear()
+            self._run_touched.clear()
+            self._run_sizes.clear()
+            self._run_bytes = 0
+            self._graph_index.clear()
+            self._run_index.clear()
+    
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            largest = heapq.nlargest(top, self._run_sizes.items(), key=lambda item: item[1])
+            return {
+                "graphs": len(self.graphs),
+                "runs": len(self.runs),
+                "run_bytes": self._run_bytes,
+                "limits": {
+                    "max_graphs": self.max_graphs,
+                    "max_runs": self.max_runs,
+                    "max_bytes": self.max_bytes,
+                    "ttl_seconds": self.ttl_seconds
+                },
+                "evictions": {kind: dict(counts) for kind, counts in self.evictions.items()},
+                "backend": "memory",
+                "largest_runs": [{"run_id": run_id, "bytes": size} for run_id, size in largest]
+            }
+    
+    def _remove_run(self, run_id: str, reason: str):
+        self.runs.pop(run_id, None)
+        self._run_touched.pop(run_id, None)
+        self._run_bytes -= self._run_sizes.pop(run_id, 0)
+        self._run_index.remove(run_id)
+        self.evictions["runs"][reason] += 1
+    
+    def _remove_graph(self, graph_id: str, reason: str):
+        graph = self.graphs.pop(graph_id, None)
+        if graph is not None:
+            self._release_graph(graph)
+        self._graph_touched.pop(graph_id, None)
+        self._graph_index.remove(graph_id)
+        self.evictions["graphs"][reason] += 1
+    
+    def _expire(self, now: float):
+        if self.ttl_seconds is None:
+            return
+        deadline = now - self.ttl_seconds
+        while self.runs:
+            run_id = next(iter(self.runs))
+            if self._run_touched.get(run_id, now) > deadline:
+                break
+            self._remove_run(run_id, "ttl")
+        while self.graphs:
+            graph_id = next(iter(self.graphs))
+            if self._graph_touched.get(graph_id, now) > deadline:
+                break
+            self._remove_graph(graph_id, "ttl")
+    
+    def _evict(self, now: float):
+        self._expire(now)
+        while self.max_runs is not None and len(self.runs) > self.max_runs:
+            self._remove_run(next(iter(self.runs)), "capacity")
+        while self.max_bytes is not None and self._run_bytes > self.max_bytes and len(self.runs) > 1:
+            self._remove_run(next(iter(self.runs)), "bytes")
+        while self.max_graphs is not None and len(self.graphs) > self.max_graphs:
+            self._remove_graph(next(iter(self.graphs)), "capacity")
@@ -0,0 +1,261 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from app.storage.base import Page, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS graphs (
+    graph_id TEXT PRIMARY KEY,
+    workflow_type TEXT NOT NULL,
+    config TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    graph_id TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_graphs_created_at ON graphs(created_at);
+CREATE INDEX IF NOT EXISTS idx_graphs_workflow_type ON graphs(workflow_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs(created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_graph_id ON runs(graph_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status, created_at);
+"""
+
+UPSERT_RUN = """
+INSERT INTO runs (run_id, graph_id, status, created_at, updated_at, size, data)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(run_id) DO UPDATE SET
+    graph_id = excluded.graph_id,
+    status = excluded.status,
+    updated_at = excluded.updated_at,
+    size = excluded.size,
+    data = excluded.data
+"""
+
+class SQLiteStorage(StorageBackend):
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 0.05,
+                 graph_cache_size: int = 256):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.graph_cache_size = graph_cache_size
+        
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        
+        self._lock = threading.RLock()
+        self._pending: "OrderedDict[str, tuple]" = OrderedDict()
+        self._graphs: "OrderedDict[str, Any]" = OrderedDict()
+        self.batches_flushed = 0
+        self.rows_flushed = 0
+        
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="sqlite-storage-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+    
+    def add_graph(self, graph_id: str, graph: Any):
+        workflow_type = getattr(graph, "workflow_type", None)
+        if not workflow_type:
+            raise ValueError("SQLite storage can only persist graphs built from a registered workflow type")
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO graphs (graph_id, workflow_type, config, created_at) VALUES (?, ?, ?, ?)",
+                (graph_id, workflow_type, json.dumps(graph.config, default=str), time.time())
+            )
+            self._cache_graph(graph_id, graph)
+    
+    def get_graph(self, graph_id: str):
+        with self._lock:
+            graph = self._graphs.get(graph_id)
+            if graph is not None:
+                self._graphs.move_to_end(graph_id)
+                return graph
+            row = self._conn.execute(
+                "SELECT workflow_type, config FROM graphs WHERE graph_id = ?", (graph_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        
+        from app.workflows.templates import graph_templates
+        graph = graph_templates.acquire(row[0], graph_id, json.loads(row[1]))
+        with self._lock:
+            self._cache_graph(graph_id, graph)
+        return graph
+    
+    def remove_graph(self, graph_id: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM graphs WHERE graph_id = ?", (graph_id,)).rowcount
+            graph = self._graphs.pop(graph_id, None)
+        if graph is not None:
+            self._release_graph(graph)
+        return deleted > 0
+    
+    def list_graphs(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT graph_id FROM graphs ORDER BY created_at").fetchall()
+        return [row[0] for row in rows]
+    
+    def list_graphs_page(self, limit: int, cursor: str = None, order: str = "asc", workflow_type: str = None,
+                         created_after: float = None, created_before: float = None) -> Page:
+        filters = {"workflow_type": workflow_type}
+        with self._lock:
+            return self._page("graphs", "graph_id", limit, cursor, order, filters, created_after, created_before)
+    
+    def add_run(self, run_id: str, run_data: Dict):
+        data = json.dumps(run_data, default=str)
+        now = time.time()
+        
+        with self._lock:
+            pending = self._pending.get(run_id)
+            created = pending[3] if pending is not None else now
+            row = (run_id, run_data.get("graph_id"), run_data.get("status", "completed"), created, now, len(data), data)
+            self._pending[run_id] = row
+            self._pending.move_to_end(run_id)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+    
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._pending.get(run_id)
+            if row is not None:
+                return json.loads(row[6])
+            row = self._conn.execute("SELECT data FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def list_runs(self) -> List[str]:
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute("SELECT run_id FROM runs ORDER BY created_at").fetchall()
+        return [row[0] for row in rows]
+    
+    def list_runs_page(self, limit: int, cursor: str = None, order: str = "asc", status: str = None,
+                       graph_id: str = None, created_after: float = None, created_before: float = None) -> Page:
+        filters = {"status": status, "graph_id": graph_id}
+        with self._lock:
+            self._flush_locked()
+            return self._page("runs", "run_id", limit, cursor, order, filters, created_after, created_before)
+    
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+    
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            for graph in self._graphs.values():
+                self._release_graph(graph)
+            self._graphs.clear()
+            self._conn.execute("DELETE FROM runs")
+            self._conn.execute("DELETE FROM graphs")
+    
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            self._flush_locked()
+            graphs = self._conn.execute("SELECT COUNT(*) FROM graphs").fetchone()[0]
+            runs, run_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM runs").fetchone()
+            largest = self._conn.execute(
+                "SELECT run_id, size FROM runs ORDER BY size DESC LIMIT ?", (top,)
+            ).fetchall()
+        return {
+            "graphs": graphs,
+            "runs": runs,
+            "run_bytes": run_bytes,
+            "backend": "sqlite",
+            "path": self.path,
+            "batches_flushed": self.batches_flushed,
+            "rows_flushed": self.rows_flushed,
+            "largest_runs": [{"run_id": run_id, "bytes": size} for run_id, size in largest]
+        }
+    
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+    
+    def _cache_graph(self, graph_id: str, graph: Any):
+        previous = self._graphs.get(graph_id)
+        if previous is not None and previous is not graph:
+            self._release_graph(previous)
+        self._graphs[graph_id] = graph
+        self._graphs.move_to_end(graph_id)
+        while len(self._graphs) > self.graph_cache_size:
+            self._release_graph(self._graphs.popitem(last=False)[1])
+    
+    def _page(self, table: str, id_column: str, limit: int, cursor: Optional[str], order: str,
+              filters: Dict[str, Any], created_after: Optional[float], created_before: Optional[float]) -> Page:
+        clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        params: List[Any] = [value for value in filters.values() if value is not None]
+        if created_after is not None:
+            clauses.append("created_at > ?")
+            params.append(created_after)
+        if created_before is not None:
+            clauses.append("created_at < ?")
+            params.append(created_before)
+        if cursor is not None:
+            try:
+                created, rowid = cursor.split(":")
+                params.extend((float(created), int(rowid)))
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            clauses.append("(created_at, rowid) > (?, ?)" if order == "asc" else "(created_at, rowid) < (?, ?)")
+        
+        direction = "ASC" if order == "asc" else "DESC"
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn.execute(
+            f"SELECT {id_column}, created_at, rowid FROM {table} {where} "
+            f"ORDER BY created_at {direction}, rowid {direction} LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1][1]!r}:{rows[-1][2]}"
+        return [row[0] for row in rows], next_cursor
+    
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        rows = list(self._pending.values())
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(UPSERT_RUN, rows)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._pending.clear()
+        self.batches_flushed += 1
+        self.rows_flushed += len(rows)
+    
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._closed.is_set():
+                    return
+                try:
+                    self._flush_locked()
+                except sqlite3.Error:
+                    logger.exception("Failed to flush pending runs to %s", self.path)
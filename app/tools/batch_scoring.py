@@ -0,0 +1,69 @@
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HIGH_COMPLEXITY = 3
+
+def columns(files: Iterable[Tuple[List[Dict], Dict]]) -> Dict[str, List[int]]:
+    result = {"lines": [], "args": [], "cyclomatic": [], "file_ids": [], "warnings": [], "infos": []}
+    for file_id, (functions, issues_data) in enumerate(files):
+        for func in functions:
+            result["lines"].append(func["lines"])
+            result["args"].append(func["args"])
+            result["cyclomatic"].append(func.get("cyclomatic", 1))
+            result["file_ids"].append(file_id)
+        severities = [issue["severity"] for issue in issues_data["issues"]]
+        result["warnings"].append(severities.count("warning"))
+        result["infos"].append(severities.count("info"))
+    return result
+
+def complexity_batch(lines: Sequence[int], args: Sequence[int], cyclomatic: Sequence[int]):
+    if np is None:
+        return [
+            c + (l > 10) + (l > 20) + (l > 50) + (a > 3) + (a > 5)
+            for l, a, c in zip(lines, args, cyclomatic)
+        ]
+    lines = np.asarray(lines)
+    args = np.asarray(args)
+    return (
+        np.asarray(cyclomatic, dtype=np.int64)
+        + (lines > 10) + (lines > 20) + (lines > 50)
+        + (args > 3) + (args > 5)
+    )
+
+def _score_python(complexity, file_ids, warnings, infos) -> Dict[str, List]:
+    files = len(warnings)
+    totals = [0] * files
+    counts = [0] * files
+    high = [0] * files
+    for score, file_id in zip(complexity, file_ids):
+        totals[file_id] += score
+        counts[file_id] += 1
+        high[file_id] += score > HIGH_COMPLEXITY
+    
+    average = [total / count if count else 0 for total, count in zip(totals, counts)]
+    quality = [
+        max(0, min(100, 100 - avg * 5 - h * 8 - (w * 3 + i)))
+        for avg, h, w, i in zip(average, high, warnings, infos)
+    ]
+    return {"complexity": complexity, "average": average, "high_complexity": high, "quality_score": quality}
+
+def score_batch(lines: Sequence[int], args: Sequence[int], cyclomatic: Sequence[int],
+                file_ids: Sequence[int], warnings: Sequence[int], infos: Sequence[int]) -> Dict[str, Any]:
+    complexity = complexity_batch(lines, args, cyclomatic)
+    if np is None:
+        return _score_python(complexity, file_ids, warnings, infos)
+    
+    files = len(warnings)
+    file_ids = np.asarray(file_ids, dtype=np.int64)
+    totals = np.bincount(file_ids, weights=complexity, minlength=files)
+    counts = np.bincount(file_ids, minlength=files)
+    high = np.bincount(file_ids, weights=complexity > HIGH_COMPLEXITY, minlength=files).astype(np.int64)
+    
+    average = np.divide(totals, counts, out=np.zeros(files), where=counts > 0)
+    penalty = np.asarray(warnings, dtype=np.int64) * 3 + np.asarray(infos, dtype=np.int64)
+    quality = np.clip(100 - average * 5 - high * 8 - penalty, 0, 100)
+    return {"complexity": complexity, "average": average, "high_complexity": high, "quality_score": quality}
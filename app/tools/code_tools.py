@@ -1,38 +1,227 @@
 import re
 import ast
-from typing import Dict, List, Any
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 
-def extract_functions(code: str) -> Dict[str, Any]:
+MAX_LINE_LENGTH = 120
+MAX_NESTING = 4
+BLOCK_CACHE_SIZE = 4096
+ANALYSIS_CACHE_SIZE = 64
+CONTINUATION = re.compile(r"[)\]}#]|(?:else|elif|except|finally)\b")
+
+class CodeAnalyzer(ast.NodeVisitor):
+    DECISION_NODES = (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.Assert)
+    BLOCK_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try, ast.Match)
+    
+    def __init__(self):
+        self.functions: List[Dict[str, Any]] = []
+        self._stack: List[Dict[str, Any]] = []
+        self._depths: List[int] = []
+        self._classes: List[str] = []
+    
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self._classes.append(node.name)
+        self.generic_visit(node)
+        self._classes.pop()
+    
+    def visit_FunctionDef(self, node):
+        func = {
+            "name": node.name,
+            "lineno": node.lineno,
+            "args": len(node.args.args),
+            "lines": node.end_lineno - node.lineno if node.end_lineno else 1,
+            "end_lineno": node.end_lineno or node.lineno,
+            "cyclomatic": 1,
+            "nesting": 0,
+            "async": isinstance(node, ast.AsyncFunctionDef),
+            "class": self._classes[-1] if self._classes else None
+        }
+        self.functions.append(func)
+        
+        self._stack.append(func)
+        self._depths.append(0)
+        classes, self._classes = self._classes, []
+        self.generic_visit(node)
+        self._classes = classes
+        self._depths.pop()
+        self._stack.pop()
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def generic_visit(self, node):
+        func = self._stack[-1] if self._stack else None
+        if func is None:
+            return super().generic_visit(node)
+        
+        if isinstance(node, self.DECISION_NODES):
+            func["cyclomatic"] += 1
+        elif isinstance(node, ast.BoolOp):
+            func["cyclomatic"] += len(node.values) - 1
+        elif isinstance(node, ast.comprehension):
+            func["cyclomatic"] += 1 + len(node.ifs)
+        elif isinstance(node, ast.match_case):
+            func["cyclomatic"] += 1
+        
+        if isinstance(node, self.BLOCK_NODES):
+            self._depths[-1] += 1
+            func["nesting"] = max(func["nesting"], self._depths[-1])
+            super().generic_visit(node)
+            self._depths[-1] -= 1
+        else:
+            super().generic_visit(node)
+
+def _long_lines(code: str, limit: int = MAX_LINE_LENGTH) -> List[int]:
+    long_lines = []
+    lineno = 1
+    pos = 0
+    for match in re.finditer(r"^[^\n]{%d,}" % (limit + 1), code, re.MULTILINE):
+        lineno += code.count("\n", pos, match.start())
+        pos = match.start()
+        long_lines.append(lineno)
+    return long_lines
+
+def _scan_functions(code: str) -> List[Dict[str, Any]]:
     functions = []
-    try:
-        tree = ast.parse(code)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
+    lines = code.split('\n')
+    for i, line in enumerate(lines):
+        if line.strip().startswith('def '):
+            match = re.search(r'def\s+(\w+)\s*\(', line)
+            if match:
                 functions.append({
-                    "name": node.name,
-                    "lineno": node.lineno,
-                    "args": len(node.args.args),
-                    "lines": node.end_lineno - node.lineno if hasattr(node, 'end_lineno') else 1
+                    "name": match.group(1),
+                    "lineno": i + 1,
+                    "args": line.count(',') + 1 if '(' in line else 0,
+                    "lines": 1,
+                    "end_lineno": i + 1,
+                    "cyclomatic": 1,
+                    "nesting": 0,
+                    "async": line.strip().startswith('async '),
+                    "class": None
                 })
-    except:
-        lines = code.split('\n')
-        for i, line in enumerate(lines):
-            if line.strip().startswith('def '):
-                match = re.search(r'def\s+(\w+)\s*\(', line)
-                if match:
-                    functions.append({
-                        "name": match.group(1),
-                        "lineno": i + 1,
-                        "args": line.count(',') + 1 if '(' in line else 0,
-                        "lines": 1
-                    })
+    return functions
+
+@lru_cache(maxsize=16)
+def analyze_code(code: str) -> Dict[str, Any]:
+    try:
+        analyzer = CodeAnalyzer()
+        analyzer.visit(ast.parse(code))
+        functions = analyzer.functions
+        parsed = True
+    except Exception:
+        functions = _scan_functions(code)
+        parsed = False
+    
+    return {
+        "functions": functions,
+        "long_lines": _long_lines(code),
+        "size": len(code),
+        "parsed": parsed
+    }
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+
+def split_blocks(code: str) -> List[Tuple[int, str]]:
+    blocks = []
+    lines = []
+    start = 1
+    for lineno, line in enumerate(code.split("\n"), start=1):
+        top_level = line[:1] not in ("", " ", "\t") and not CONTINUATION.match(line)
+        if top_level and lines and not lines[-1].startswith("@"):
+            blocks.append((start, "\n".join(lines)))
+            lines = []
+            start = lineno
+        lines.append(line)
+    if lines:
+        blocks.append((start, "\n".join(lines)))
+    return blocks
+
+_block_results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_analyses: "OrderedDict[str, Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cache_get(cache: OrderedDict, key: Optional[str]) -> Any:
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+def _cache_put(cache: OrderedDict, key: str, value: Any, limit: int):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+def _analyze_block(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    analyzer = CodeAnalyzer()
+    analyzer.visit(tree)
+    return {"functions": analyzer.functions, "long_lines": _long_lines(text)}
+
+def analyze_code_incremental(code: str, base_hash: str = None) -> Dict[str, Any]:
+    digest = code_hash(code)
+    cached = _cache_get(_analyses, digest)
+    if cached is not None:
+        return cached[0]
     
+    base = _cache_get(_analyses, base_hash) if base_hash else None
+    base_blocks = base[1] if base is not None else {}
+    blocks = {}
+    functions = []
+    long_lines = []
+    reused = 0
+    for start, text in split_blocks(code):
+        key = code_hash(text)
+        result = base_blocks.get(key) or _cache_get(_block_results, key)
+        if result is not None:
+            reused += 1
+        else:
+            result = _analyze_block(text)
+            if result is None:
+                blocks = None
+                break
+            _cache_put(_block_results, key, result, BLOCK_CACHE_SIZE)
+        blocks[key] = result
+        
+        offset = start - 1
+        for func in result["functions"]:
+            functions.append({**func, "lineno": func["lineno"] + offset, "end_lineno": func["end_lineno"] + offset})
+        long_lines.extend(lineno + offset for lineno in result["long_lines"])
+    
+    if blocks is None:
+        analysis = {**analyze_code(code), "code_hash": digest, "incremental": False, "blocks": 0, "reused_blocks": 0}
+        blocks = {}
+    else:
+        analysis = {
+            "functions": functions,
+            "long_lines": long_lines,
+            "size": len(code),
+            "parsed": True,
+            "code_hash": digest,
+            "incremental": True,
+            "blocks": len(blocks),
+            "reused_blocks": reused
+        }
+    _cache_put(_analyses, digest, (analysis, blocks), ANALYSIS_CACHE_SIZE)
+    return analysis
+
+def extract_functions(code: str) -> Dict[str, Any]:
+    functions = [dict(func) for func in analyze_code(code)["functions"]]
     return {"functions": functions, "count": len(functions)}
 
 def check_complexity(functions: List[Dict]) -> Dict[str, Any]:
     complexity_scores = []
     for func in functions:
-        score = 1
+        cyclomatic = func.get("cyclomatic", 1)
+        score = cyclomatic
         if func["lines"] > 50:
             score += 3
         elif func["lines"] > 20:
@@ -48,7 +237,7 @@ def check_complexity(functions: List[Dict]) -> Dict[str, Any]:
         complexity_scores.append({
             "name": func["name"],
             "complexity": score,
-            "reason": f"lines={func['lines']}, args={func['args']}"
+            "reason": f"lines={func['lines']}, args={func['args']}, cyclomatic={cyclomatic}"
         })
     
     avg_complexity = sum(s["complexity"] for s in complexity_scores) / len(complexity_scores) if complexity_scores else 0
@@ -59,7 +248,7 @@ def check_complexity(functions: List[Dict]) -> Dict[str, Any]:
         "high_complexity": [s for s in complexity_scores if s["complexity"] > 3]
     }
 
-def detect_issues(code: str, functions: List[Dict]) -> Dict[str, Any]:
+def detect_issues(code: str, functions: List[Dict], long_lines: List[int] = None) -> Dict[str, Any]:
     issues = []
     
     if len(code) > 5000:
@@ -81,17 +270,25 @@ def detect_issues(code: str, functions: List[Dict]) -> Dict[str, Any]:
                 "function": func["name"],
                 "message": f"Function has {func['lines']} lines, consider breaking it down"
             })
-    
-    lines = code.split('\n')
-    for i, line in enumerate(lines):
-        if len(line) > 120:
+        
+        if func.get("nesting", 0) > MAX_NESTING:
             issues.append({
-                "type": "line_length",
-                "severity": "info",
-                "line": i + 1,
-                "message": "Line exceeds 120 characters"
+                "type": "nesting",
+                "severity": "warning",
+                "function": func["name"],
+                "message": f"Function nests {func['nesting']} levels deep, consider flattening it"
             })
     
+    if long_lines is None:
+        long_lines = analyze_code(code)["long_lines"]
+    for lineno in long_lines:
+        issues.append({
+            "type": "line_length",
+            "severity": "info",
+            "line": lineno,
+            "message": f"Line exceeds {MAX_LINE_LENGTH} characters"
+        })
+    
     return {"issues": issues, "count": len(issues)}
 
 def suggest_improvements(complexity_data: Dict, issues_data: Dict) -> Dict[str, Any]:
@@ -127,10 +324,7 @@ def calculate_quality_score(complexity_data: Dict, issues_data: Dict) -> float:
     base_score -= complexity_data["average"] * 5
     base_score -= len(complexity_data["high_complexity"]) * 8
     
-    for issue in issues_data["issues"]:
-        if issue["severity"] == "warning":
-            base_score -= 3
-        elif issue["severity"] == "info":
-            base_score -= 1
+    severities = [issue["severity"] for issue in issues_data["issues"]]
+    base_score -= severities.count("warning") * 3 + severities.count("info")
     
     return max(0, min(100, base_score))
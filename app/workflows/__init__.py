@@ -0,0 +1,21 @@
+from typing import Any, Callable, Dict
+from app.engine.graph import WorkflowGraph
+from app.workflows.code_review import create_code_review_graph
+from app.workflows.repo_review import create_repo_review_graph
+
+WORKFLOWS: Dict[str, Callable[[str, Dict[str, Any]], WorkflowGraph]] = {
+    "code_review": create_code_review_graph,
+    "repo_review": create_repo_review_graph
+}
+
+def build_workflow(workflow_type: str, graph_id: str, config: Dict[str, Any]) -> WorkflowGraph:
+    factory = WORKFLOWS.get(workflow_type)
+    if factory is None:
+        raise ValueError(f"Unknown workflow type: {workflow_type}")
+    
+    config = config or {}
+    graph = factory(graph_id, config)
+    graph.workflow_type = workflow_type
+    graph.config = config
+    graph.compile()
+    return graph
@@ -1,15 +1,31 @@
 from app.engine.graph import WorkflowGraph
 from app.engine.state import WorkflowState
 from app.tools.code_tools import (
+    analyze_code_incremental,
     extract_functions,
     check_complexity,
     detect_issues,
     suggest_improvements,
     calculate_quality_score
 )
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+def _incremental_analysis(state: WorkflowState) -> Optional[Dict[str, Any]]:
+    if state.get("incremental") is False:
+        return None
+    return analyze_code_incremental(state.get("code", ""), state.get("base_hash"))
 
 def extract_node(state: WorkflowState) -> Dict[str, Any]:
+    analysis = _incremental_analysis(state)
+    if analysis is not None:
+        functions = [dict(func) for func in analysis["functions"]]
+        return {
+            "functions": functions,
+            "function_count": len(functions),
+            "code_hash": analysis["code_hash"],
+            "reused_blocks": analysis["reused_blocks"]
+        }
+    
     code = state.get("code", "")
     result = extract_functions(code)
     
@@ -31,7 +47,8 @@ def analyze_node(state: WorkflowState) -> Dict[str, Any]:
 def detect_node(state: WorkflowState) -> Dict[str, Any]:
     code = state.get("code", "")
     functions = state.get("functions", [])
-    issues = detect_issues(code, functions)
+    analysis = _incremental_analysis(state)
+    issues = detect_issues(code, functions, analysis["long_lines"] if analysis is not None else None)
     
     return {
         "issues": issues["issues"],
@@ -72,17 +89,22 @@ def should_continue(state: WorkflowState) -> str:
     return "extract"
 
 def create_code_review_graph(graph_id: str, config: Dict[str, Any]) -> WorkflowGraph:
-    graph = WorkflowGraph(graph_id)
+    graph = WorkflowGraph(graph_id, executor=config.get("executor", "thread"))
+    
+    cached = config.get("cache", True)
+    policy = {"timeout": config.get("node_timeout"), "retries": config.get("node_retries", 0)}
     
-    graph.add_node("extract", extract_node)
-    graph.add_node("analyze", analyze_node)
-    graph.add_node("detect", detect_node)
-    graph.add_node("suggest", suggest_node)
+    graph.add_node("extract", extract_node, kind="cpu", inputs=["code", "incremental", "base_hash"],
+                   cached=cached, **policy)
+    graph.add_node("analyze", analyze_node, kind="cpu", inputs=["functions"], cached=cached, **policy)
+    graph.add_node("detect", detect_node, kind="cpu", inputs=["code", "functions", "incremental", "base_hash"],
+                   cached=cached, **policy)
+    graph.add_join("suggest", suggest_node, conflict="error", **policy)
     
-    graph.add_edge("extract", "analyze")
-    graph.add_edge("analyze", "detect")
+    graph.add_edge("extract", ["analyze", "detect"])
+    graph.add_edge("analyze", "suggest")
     graph.add_edge("detect", "suggest")
-    graph.add_conditional_edge("suggest", should_continue)
+    graph.add_conditional_edge("suggest", should_continue, targets=["extract"])
     
     graph.set_start("extract")
     
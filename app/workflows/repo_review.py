@@ -0,0 +1,218 @@
+import fnmatch
+import heapq
+import itertools
+import os
+import tarfile
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from app.engine.executors import get_executor
+from app.engine.graph import WorkflowGraph
+from app.engine.state import WorkflowState
+from app.tools.code_tools import calculate_quality_score, check_complexity, detect_issues, extract_functions
+
+DEFAULT_PATTERNS = ["*.py"]
+SKIP_DIRS = {"__pycache__", "node_modules", "venv", "site-packages"}
+MAX_FILE_BYTES = 1024 * 1024
+DEFAULT_WINDOW = 32
+TOP_FILES = 20
+MAX_ERRORS = 20
+
+Source = Tuple[str, Optional[str], Optional[str]]
+
+def review_source(path: str, code: Optional[str] = None, root: Optional[str] = None) -> Dict[str, Any]:
+    if code is None:
+        with open(os.path.join(root, path), encoding="utf-8", errors="replace") as f:
+            code = f.read()
+    
+    functions = extract_functions(code)["functions"]
+    complexity = check_complexity(functions)
+    issues = detect_issues(code, functions)
+    score = calculate_quality_score(complexity, issues)
+    
+    return {
+        "path": path,
+        "lines": code.count("\n") + 1,
+        "functions": len(functions),
+        "complexity_total": sum(item["complexity"] for item in complexity["scores"]),
+        "high_complexity": len(complexity["high_complexity"]),
+        "issues": issues["count"],
+        "warnings": sum(1 for issue in issues["issues"] if issue["severity"] == "warning"),
+        "quality_score": score
+    }
+
+def _empty_totals() -> Dict[str, float]:
+    return {
+        "files": 0, "lines": 0, "functions": 0, "complexity_total": 0, "high_complexity": 0,
+        "issues": 0, "warnings": 0, "weighted_score": 0.0
+    }
+
+def _finish(totals: Dict[str, float]) -> Dict[str, Any]:
+    summary = {key: value for key, value in totals.items() if key not in ("complexity_total", "weighted_score")}
+    summary["average_complexity"] = totals["complexity_total"] / totals["functions"] if totals["functions"] else 0
+    summary["quality_score"] = totals["weighted_score"] / totals["lines"] if totals["lines"] else 100
+    return summary
+
+class RepoReport:
+    def __init__(self, top_files: int = TOP_FILES):
+        self.top_files = top_files
+        self.totals = _empty_totals()
+        self.modules: Dict[str, Dict[str, float]] = {}
+        self.skipped = 0
+        self.errors: List[Dict[str, str]] = []
+        self.failed = 0
+        self._worst: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._sequence = itertools.count()
+    
+    def add(self, summary: Dict[str, Any]):
+        module = os.path.dirname(summary["path"]) or "."
+        for totals in (self.totals, self.modules.setdefault(module, _empty_totals())):
+            totals["files"] += 1
+            for key in ("lines", "functions", "complexity_total", "high_complexity", "issues", "warnings"):
+                totals[key] += summary[key]
+            totals["weighted_score"] += summary["quality_score"] * summary["lines"]
+        
+        heapq.heappush(self._worst, (-summary["quality_score"], next(self._sequence), summary))
+        if len(self._worst) > self.top_files:
+            heapq.heappop(self._worst)
+    
+    def fail(self, path: str, error: Exception):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"path": path, "error": str(error)})
+    
+    def result(self) -> Dict[str, Any]:
+        worst = sorted((entry[2] for entry in self._worst), key=lambda summary: summary["quality_score"])
+        return {
+            "repo": {**_finish(self.totals), "skipped_files": self.skipped, "failed_files": self.failed},
+            "modules": {module: _finish(totals) for module, totals in sorted(self.modules.items())},
+            "worst_files": [
+                {key: value for key, value in summary.items() if key != "complexity_total"} for summary in worst
+            ],
+            "errors": self.errors
+        }
+
+def _matches(path: str, patterns: List[str]) -> bool:
+    name = os.path.basename(path)
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+def _resolve_local(path: str, allowed_root: Optional[str]) -> str:
+    if not allowed_root:
+        raise ValueError("Reviewing local paths requires an allowed_root")
+    root = os.path.realpath(allowed_root)
+    target = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, target]) != root:
+        raise ValueError(f"Path is outside the allowed root: {path}")
+    return target
+
+def _directory_sources(root: str, allowed_root: str, patterns: List[str], max_bytes: int,
+                       report: RepoReport) -> Iterator[Source]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if name not in SKIP_DIRS and not name.startswith("."))
+        for name in sorted(filenames):
+            if not _matches(name, patterns):
+                continue
+            path = os.path.join(dirpath, name)
+            relpath = os.path.relpath(path, root)
+            target = os.path.realpath(path)
+            if os.path.commonpath([allowed_root, target]) != allowed_root:
+                report.skipped += 1
+                continue
+            try:
+                size = os.path.getsize(target)
+            except OSError as e:
+                report.fail(relpath, e)
+                continue
+            if size > max_bytes:
+                report.skipped += 1
+                continue
+            yield relpath, None, root
+
+def _tarball_sources(path: str, patterns: List[str], max_bytes: int, report: RepoReport) -> Iterator[Source]:
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            if not member.isfile() or not _matches(member.name, patterns):
+                continue
+            if member.size > max_bytes:
+                report.skipped += 1
+                continue
+            data = archive.extractfile(member).read()
+            yield member.name, data.decode("utf-8", errors="replace"), None
+
+def _sources(state: WorkflowState, config: Dict[str, Any], report: RepoReport) -> Iterator[Source]:
+    patterns = config.get("patterns", DEFAULT_PATTERNS)
+    max_bytes = config.get("max_file_bytes", MAX_FILE_BYTES)
+    allowed_root = config.get("allowed_root") or os.environ.get("WORKFLOW_REVIEW_ROOT")
+    
+    for item in state.get("files") or []:
+        if isinstance(item, dict):
+            yield item["path"], item.get("code", ""), None
+        else:
+            target = _resolve_local(item, allowed_root)
+            yield os.path.basename(target), None, os.path.dirname(target)
+    if state.get("path"):
+        root = _resolve_local(state.get("path"), allowed_root)
+        yield from _directory_sources(root, os.path.realpath(allowed_root), patterns, max_bytes, report)
+    if state.get("tarball"):
+        yield from _tarball_sources(_resolve_local(state.get("tarball"), allowed_root), patterns, max_bytes, report)
+
+def make_review_node(config: Dict[str, Any]) -> Callable[[WorkflowState], Dict[str, Any]]:
+    def review_node(state: WorkflowState) -> Dict[str, Any]:
+        executor = get_executor(config.get("executor", "process"))
+        window = config.get("window", DEFAULT_WINDOW)
+        report = RepoReport(config.get("top_files", TOP_FILES))
+        pending: Dict[Future, str] = {}
+        
+        def collect(done):
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    report.add(future.result())
+                except Exception as e:
+                    report.fail(path, e)
+        
+        for path, code, root in _sources(state, config, report):
+            if executor is None:
+                try:
+                    report.add(review_source(path, code, root))
+                except Exception as e:
+                    report.fail(path, e)
+                continue
+            pending[executor.submit(review_source, path, code, root)] = path
+            if len(pending) >= window:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+        collect(wait(pending).done if pending else [])
+        
+        return report.result()
+    
+    return review_node
+
+def summarize_node(state: WorkflowState) -> Dict[str, Any]:
+    repo = state.get("repo", {})
+    modules = state.get("modules", {})
+    
+    suggestions = []
+    for name, summary in sorted(modules.items(), key=lambda item: item[1]["quality_score"])[:5]:
+        if summary["quality_score"] >= 90:
+            break
+        suggestions.append({
+            "category": "module",
+            "suggestion": f"Review {name}: quality {summary['quality_score']:.0f} across {summary['files']} files",
+            "priority": "high" if summary["quality_score"] < 50 else "medium"
+        })
+    
+    return {
+        "quality_score": repo.get("quality_score", 100),
+        "suggestions": suggestions,
+        "suggestion_count": len(suggestions)
+    }
+
+def create_repo_review_graph(graph_id: str, config: Dict[str, Any]) -> WorkflowGraph:
+    graph = WorkflowGraph(graph_id, executor="thread")
+    policy = {"timeout": config.get("node_timeout"), "retries": config.get("node_retries", 0)}
+    
+    graph.add_node("review", make_review_node(config), kind="io", **policy)
+    graph.add_node("summarize", summarize_node)
+    graph.add_edge("review", "summarize")
+    graph.set_start("review")
+    
+    return graph
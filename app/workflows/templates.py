@@ -0,0 +1,87 @@
+import hashlib
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional
+from app.engine.compiled import CompiledGraph
+from app.engine.graph import WorkflowGraph
+from app.engine.state import WorkflowState
+
+def template_key(workflow_type: str, config: Optional[Dict[str, Any]]) -> str:
+    canonical = json.dumps(config or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{workflow_type}:{canonical}".encode()).hexdigest()
+
+class SharedGraph:
+    def __init__(self, graph_id: str, template: WorkflowGraph, key: str, templates: "GraphTemplateCache"):
+        self.graph_id = graph_id
+        self.template = template
+        self.key = key
+        self._templates = templates
+        self._released = False
+    
+    def __getattr__(self, name: str) -> Any:
+        if name == "template":
+            raise AttributeError(name)
+        return getattr(self.template, name)
+    
+    def compile(self) -> CompiledGraph:
+        return self.template.compile()
+    
+    async def run(self, initial_state: Dict[str, Any], run_id: str = None,
+                  **options) -> tuple[WorkflowState, List[Dict]]:
+        return await self.compile().run(initial_state, run_id, graph_id=self.graph_id, **options)
+    
+    async def stream(self, initial_state: Dict[str, Any], run_id: str = None,
+                     **options) -> AsyncIterator[Dict[str, Any]]:
+        async for event in self.compile().stream(initial_state, run_id, graph_id=self.graph_id, **options):
+            yield event
+    
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._templates.release(self.key)
+
+class GraphTemplateCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates: Dict[str, List[Any]] = {}
+        self.builds = 0
+        self.hits = 0
+    
+    def acquire(self, workflow_type: str, graph_id: str, config: Optional[Dict[str, Any]]) -> SharedGraph:
+        from app.workflows import build_workflow
+        
+        key = template_key(workflow_type, config)
+        with self._lock:
+            entry = self._templates.get(key)
+            if entry is None:
+                entry = [build_workflow(workflow_type, f"template-{key[:16]}", config), 0]
+                self._templates[key] = entry
+                self.builds += 1
+            else:
+                self.hits += 1
+            entry[1] += 1
+        return SharedGraph(graph_id, entry[0], key, self)
+    
+    def release(self, key: str):
+        with self._lock:
+            entry = self._templates.get(key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._templates[key]
+    
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "templates": len(self._templates),
+                "references": sum(refs for _, refs in self._templates.values()),
+                "builds": self.builds,
+                "hits": self.hits
+            }
+
+graph_templates = GraphTemplateCache()
@@ -0,0 +1,86 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+import pytest
+
+try:
+    import pytest_benchmark
+except ImportError:
+    pytest_benchmark = None
+
+if pytest_benchmark is None:
+    class Benchmark:
+        def __init__(self, name: str, min_rounds: int, min_time: float):
+            self.name = name
+            self.min_rounds = min_rounds
+            self.min_time = min_time
+            self.stats = None
+        
+        def __call__(self, func, *args, **kwargs):
+            result = func(*args, **kwargs)
+            timings = []
+            started = time.perf_counter()
+            while len(timings) < self.min_rounds or time.perf_counter() - started < self.min_time:
+                before = time.perf_counter()
+                result = func(*args, **kwargs)
+                timings.append(time.perf_counter() - before)
+            
+            self.stats = {
+                "name": self.name,
+                "stats": {
+                    "min": min(timings),
+                    "max": max(timings),
+                    "mean": statistics.fmean(timings),
+                    "median": statistics.median(timings),
+                    "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+                    "rounds": len(timings)
+                }
+            }
+            return result
+    
+    def pytest_addoption(parser):
+        group = parser.getgroup("benchmark")
+        group.addoption("--benchmark-json", default=None, help="Write benchmark results to this JSON file")
+        group.addoption("--benchmark-min-rounds", type=int, default=5)
+        group.addoption("--benchmark-min-time", type=float, default=0.05)
+    
+    def pytest_configure(config):
+        config._benchmark_results = []
+    
+    @pytest.fixture
+    def benchmark(request):
+        config = request.config
+        bench = Benchmark(
+            request.node.name,
+            config.getoption("--benchmark-min-rounds"),
+            config.getoption("--benchmark-min-time")
+        )
+        yield bench
+        if bench.stats is not None:
+            config._benchmark_results.append(bench.stats)
+    
+    def pytest_terminal_summary(terminalreporter, config):
+        results = config._benchmark_results
+        if not results:
+            return
+        terminalreporter.write_sep("-", "benchmarks (us)")
+        width = max(len(result["name"]) for result in results) + 2
+        terminalreporter.write_line(f"{'name':<{width}}{'median':>12}{'mean':>12}{'rounds':>8}")
+        for result in results:
+            stats = result["stats"]
+            terminalreporter.write_line(
+                f"{result['name']:<{width}}{stats['median'] * 1e6:>12.1f}{stats['mean'] * 1e6:>12.1f}{stats['rounds']:>8}"
+            )
+    
+    def pytest_sessionfinish(session):
+        path = session.config.getoption("--benchmark-json")
+        if not path:
+            return
+        with open(path, "w") as f:
+            json.dump({
+                "datetime": datetime.now(timezone.utc).isoformat(),
+                "machine_info": {"python_version": platform.python_version(), "machine": platform.machine()},
+                "benchmarks": session.config._benchmark_results
+            }, f, indent=2)
@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+os.environ.setdefault("WORKFLOW_ACCESS_LOG", "off")
+
+import httpx
+from app.api.routes import job_queue
+from app.main import app
+from benchmarks.sources import synthetic_source
+
+SCENARIOS = ["run", "run-async", "state"]
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered) - 1e-9) - 1))
+    return ordered[index]
+
+def summarize(latencies: List[float], errors: int, elapsed: float, concurrency: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000
+    }
+
+async def drive(client: httpx.AsyncClient, make_request: Callable[[int], Dict[str, Any]], total: int,
+                concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(total))
+    
+    async def worker():
+        nonlocal errors
+        for index in remaining:
+            request = make_request(index)
+            started = time.perf_counter()
+            response = await client.request(**request)
+            duration = time.perf_counter() - started
+            if response.status_code < 400:
+                latencies.append(duration)
+            else:
+                errors += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started, concurrency)
+
+async def run_load(scenarios: List[str], total: int, concurrency: int, functions: int,
+                   config: Dict[str, Any]) -> Dict[str, Any]:
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/graph/create", json={"workflow_type": "code_review", "config": config})
+            response.raise_for_status()
+            graph_id = response.json()["graph_id"]
+            def body(variant: int) -> Dict[str, Any]:
+                return {
+                    "graph_id": graph_id,
+                    "initial_state": {"code": synthetic_source(functions, variant), "quality_threshold": 0},
+                    "coalesce": False
+                }
+            
+            response = await client.post("/graph/run", json=body(0))
+            response.raise_for_status()
+            run_id = response.json()["run_id"]
+            
+            requests = {
+                "run": lambda index: {"method": "POST", "url": "/graph/run", "json": body(index + 1)},
+                "run-async": lambda index: {"method": "POST", "url": "/graph/run-async", "json": body(total + index + 1)},
+                "state": lambda index: {"method": "GET", "url": f"/graph/state/{run_id}"}
+            }
+            for name in scenarios:
+                results[name] = await drive(client, requests[name], total, concurrency)
+                while job_queue.depth() or job_queue.running:
+                    await asyncio.sleep(0.01)
+    finally:
+        await job_queue.stop()
+    return results
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    lines = []
+    for name, current in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for key in ("p95_ms", "throughput_rps"):
+            if previous[key]:
+                change = (current[key] - previous[key]) / previous[key] * 100
+                lines.append(f"{name:<12}{key:<16}{previous[key]:>12.2f}{current[key]:>12.2f}{change:>+10.1f}%")
+    return lines
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Drive the API in-process and report latency percentiles")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--functions", type=int, default=20, help="Functions in the synthetic source")
+    parser.add_argument("--executor", default="inline")
+    parser.add_argument("--output", default="load-results.json")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    config = {"executor": args.executor, "max_iterations": 1, "cache": False}
+    results = asyncio.run(run_load(args.scenarios, args.requests, args.concurrency, args.functions, config))
+    
+    print(f"{'scenario':<12}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, summary in results.items():
+        print(f"{name:<12}{summary['throughput_rps']:>10.1f}{summary['p50_ms']:>10.2f}"
+              f"{summary['p95_ms']:>10.2f}{summary['p99_ms']:>10.2f}{summary['errors']:>8}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            for line in compare(results, json.load(f)):
+                print(line)
+    
+    with open(args.output, "w") as f:
+        json.dump({
+            "datetime": datetime.now(timezone.utc).isoformat(),
+            "version": app.version,
+            "python_version": platform.python_version(),
+            "options": {**vars(args), "config": config},
+            "scenarios": results
+        }, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+from app.tools import batch_scoring
+from app.tools.code_tools import calculate_quality_score, check_complexity
+
+def synthetic_files(functions: int, per_file: int, seed: int = 7) -> List[Tuple[List[Dict], Dict]]:
+    rng = random.Random(seed)
+    files = []
+    for start in range(0, functions, per_file):
+        funcs = [
+            {
+                "name": f"f{index}",
+                "lines": rng.randint(1, 80),
+                "args": rng.randint(0, 8),
+                "cyclomatic": rng.randint(1, 12)
+            }
+            for index in range(start, min(start + per_file, functions))
+        ]
+        issues = [{"severity": rng.choice(("warning", "info"))} for _ in range(rng.randint(0, 6))]
+        files.append((funcs, {"issues": issues}))
+    return files
+
+def scalar(files: List[Tuple[List[Dict], Dict]]) -> List[float]:
+    return [calculate_quality_score(check_complexity(funcs), issues) for funcs, issues in files]
+
+def batch(files: List[Tuple[List[Dict], Dict]]) -> List[float]:
+    return list(batch_scoring.score_batch(**batch_scoring.columns(files))["quality_score"])
+
+def timed(func, *args) -> Tuple[float, object]:
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare scalar and columnar complexity/quality scoring")
+    parser.add_argument("--functions", type=int, default=200000)
+    parser.add_argument("--per-file", type=int, default=20)
+    args = parser.parse_args(argv)
+    
+    files = synthetic_files(args.functions, args.per_file)
+    cols = batch_scoring.columns(files)
+    
+    scalar_time, expected = timed(scalar, files)
+    batch_time, actual = timed(batch, files)
+    kernel_time, _ = timed(lambda: batch_scoring.score_batch(**cols))
+    
+    print(f"backend: {'numpy' if batch_scoring.np is not None else 'python'}")
+    print(f"{'path':<24}{'seconds':>10}")
+    print(f"{'scalar':<24}{scalar_time:>10.4f}")
+    print(f"{'batch (with columns)':<24}{batch_time:>10.4f}")
+    print(f"{'batch (kernel only)':<24}{kernel_time:>10.4f}")
+    print(f"identical: {[float(score) for score in actual] == [float(score) for score in expected]}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Callable, Dict
+from fastapi.responses import JSONResponse
+from app.api import responses
+from app.api.models import RunResponse
+from app.workflows import build_workflow
+from benchmarks.sources import synthetic_source
+
+def large_response(functions: int) -> Dict[str, Any]:
+    graph = build_workflow("code_review", "bench", {"executor": "inline", "max_iterations": 3, "cache": False})
+    state, execution_log = asyncio.run(graph.run({"code": synthetic_source(functions), "quality_threshold": 100}))
+    return {"run_id": "bench", "final_state": state.data, "execution_log": execution_log, "metadata": state.metadata}
+
+def validated(content: Dict[str, Any]) -> bytes:
+    prepared = RunResponse(**content).model_dump()
+    return JSONResponse(RunResponse.model_validate(prepared).model_dump(mode="json")).body
+
+def fast(content: Dict[str, Any]) -> bytes:
+    return responses.FastJSONResponse(content).body
+
+def fast_stdlib(content: Dict[str, Any]) -> bytes:
+    encoder, responses.orjson = responses.orjson, None
+    try:
+        return responses.FastJSONResponse(content).body
+    finally:
+        responses.orjson = encoder
+
+def time_per_call(func: Callable[[Dict], bytes], content: Dict[str, Any], iterations: int) -> float:
+    func(content)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(content)
+    return (time.perf_counter() - started) / iterations * 1000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare response_model serialization with the fast JSON path")
+    parser.add_argument("--functions", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args(argv)
+    
+    print(f"encoder: {'orjson' if responses.orjson is not None else 'json'}")
+    print(f"{'functions':>10}{'bytes':>12}{'validated ms':>15}{'fast ms':>10}{'stdlib ms':>11}")
+    for functions in args.functions:
+        content = large_response(functions)
+        assert json.loads(fast(content)) == json.loads(validated(content))
+        size = len(fast(content))
+        print(f"{functions:>10}{size:>12}"
+              f"{time_per_call(validated, content, args.iterations):>15.2f}"
+              f"{time_per_call(fast, content, args.iterations):>10.2f}"
+              f"{time_per_call(fast_stdlib, content, args.iterations):>11.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
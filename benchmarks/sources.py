@@ -0,0 +1,22 @@
+SIZES = [10, 100, 1000]
+
+def synthetic_source(functions: int, variant: int = 0) -> str:
+    tag = f"{variant}_" if variant else ""
+    blocks = []
+    for index in range(functions):
+        if index % 3 == 0:
+            blocks.append(
+                f"def branchy_{tag}{index}(a, b, c, d, e, f):\n"
+                "    total = 0\n"
+                "    for i in range(a):\n"
+                "        if i % 2 and b:\n"
+                "            total += i\n"
+                "        elif c or d:\n"
+                "            total -= i\n"
+                "    return total\n"
+            )
+        elif index % 3 == 1:
+            blocks.append(f"async def fetch_{tag}{index}(url):\n    return [part for part in url.split('/') if part]\n")
+        else:
+            blocks.append(f"class Service{tag}{index}:\n    def handle(self, request):\n        return request\n")
+    return "\n".join(blocks)
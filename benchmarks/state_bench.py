@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+from pydantic import BaseModel
+from app.engine.graph import WorkflowGraph
+from app.engine.state import WorkflowState
+
+class PydanticState(BaseModel):
+    data: Dict[str, Any] = {}
+    metadata: Dict[str, Any] = {}
+    iteration: int = 0
+    
+    def update(self, updates: Dict[str, Any]):
+        self.data.update(updates)
+    
+    def fork(self) -> "PydanticState":
+        return self.model_copy(update={"data": dict(self.data)})
+
+INITIAL = {"code": "def f():\n    return 1", "quality_threshold": 70}
+
+def _lifecycle(state_class: Callable) -> Callable[[], None]:
+    def run():
+        state = state_class(data=INITIAL, metadata={"run_id": "bench"})
+        state.update({"functions": []})
+        state.fork().update({"issues": []})
+        state.update({"quality_score": 90})
+    return run
+
+def time_per_call(func: Callable[[], None], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def bytes_per_instance(state_class: Callable, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    states = [state_class(data=INITIAL, metadata={"run_id": "bench"}) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del states
+    return (after - before) / count
+
+def short_graph_runs(iterations: int) -> float:
+    graph = WorkflowGraph(executor="inline")
+    graph.add_node("a", lambda state: {"a": 1})
+    graph.add_node("b", lambda state: {"b": 2})
+    graph.add_node("c", lambda state: {"c": 3})
+    graph.add_edge("a", "b")
+    graph.add_edge("b", "c")
+    
+    async def run_all():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await graph.run(INITIAL)
+        return (time.perf_counter() - started) / iterations * 1e6
+    
+    return asyncio.run(run_all())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the slotted WorkflowState with a pydantic model")
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args(argv)
+    
+    print(f"{'state':<12}{'lifecycle us':>14}{'bytes/state':>14}")
+    for name, state_class in (("pydantic", PydanticState), ("slotted", WorkflowState)):
+        micros = time_per_call(_lifecycle(state_class), args.iterations)
+        size = bytes_per_instance(state_class, min(args.iterations, 10000))
+        print(f"{name:<12}{micros:>14.2f}{size:>14.0f}")
+    
+    print(f"3-node inline graph run: {short_graph_runs(min(args.iterations, 5000)):.1f} us")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from app.engine.graph import WorkflowGraph
+from app.engine.node import Node
+from app.engine.state import WorkflowState
+from app.tools import code_tools
+from app.tools.code_tools import (
+    analyze_code,
+    analyze_code_incremental,
+    calculate_quality_score,
+    check_complexity,
+    detect_issues,
+    extract_functions,
+    suggest_improvements
+)
+from app.workflows import build_workflow
+from benchmarks.sources import SIZES, synthetic_source
+
+INITIAL = {"code": "def f():\n    return 1", "quality_threshold": 70}
+
+def clear_analysis_caches():
+    analyze_code.cache_clear()
+    with code_tools._cache_lock:
+        code_tools._analyses.clear()
+        code_tools._block_results.clear()
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}fn")
+def source(request):
+    return synthetic_source(request.param)
+
+@pytest.fixture(scope="module")
+def analysis(source):
+    functions = extract_functions(source)["functions"]
+    complexity = check_complexity(functions)
+    issues = detect_issues(source, functions)
+    return functions, complexity, issues
+
+def test_state_construction(benchmark):
+    benchmark(WorkflowState, data=INITIAL, metadata={"run_id": "bench"})
+
+def test_node_execute(benchmark, loop):
+    node = Node("double", lambda state: {"value": state.get("value", 1) * 2})
+    state = WorkflowState(data={"value": 1})
+    benchmark(lambda: loop.run_until_complete(node.execute(state)))
+
+def test_graph_run_linear(benchmark, loop):
+    graph = WorkflowGraph(executor="inline")
+    graph.add_node("a", lambda state: {"a": 1})
+    graph.add_node("b", lambda state: {"b": 2})
+    graph.add_node("c", lambda state: {"c": 3})
+    graph.add_edge("a", "b")
+    graph.add_edge("b", "c")
+    benchmark(lambda: loop.run_until_complete(graph.run(INITIAL)))
+
+def test_graph_run_code_review(benchmark, loop, source):
+    graph = build_workflow("code_review", "bench", {"executor": "inline", "max_iterations": 1, "cache": False})
+    
+    def cold():
+        clear_analysis_caches()
+        return loop.run_until_complete(graph.run({"code": source, "quality_threshold": 0}))
+    benchmark(cold)
+
+def test_extract_functions(benchmark, source):
+    def cold():
+        clear_analysis_caches()
+        return extract_functions(source)
+    benchmark(cold)
+
+def test_analyze_code_incremental_warm(benchmark, source):
+    benchmark(analyze_code_incremental, source)
+
+def test_check_complexity(benchmark, analysis):
+    benchmark(check_complexity, analysis[0])
+
+def test_detect_issues(benchmark, source, analysis):
+    benchmark(detect_issues, source, analysis[0])
+
+def test_suggest_improvements(benchmark, analysis):
+    benchmark(suggest_improvements, analysis[1], analysis[2])
+
+def test_calculate_quality_score(benchmark, analysis):
+    benchmark(calculate_quality_score, analysis[1], analysis[2])
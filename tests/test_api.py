@@ -1,17 +1,20 @@
+import asyncio
+import json
+import httpx
 import pytest
 from fastapi.testclient import TestClient
+from app.api import responses
 from app.main import app
 from app.storage import storage
+from app.workflows.templates import graph_templates
 
 client = TestClient(app)
 
 @pytest.fixture(autouse=True)
 def clear_storage():
-    storage.graphs.clear()
-    storage.runs.clear()
+    storage.clear()
     yield
-    storage.graphs.clear()
-    storage.runs.clear()
+    storage.clear()
 
 def test_root_endpoint():
     response = client.get("/")
@@ -39,6 +42,28 @@ def test_create_unknown_workflow():
     assert response.status_code == 400
     assert "Unknown workflow type" in response.json()["detail"]
 
+def test_identical_configs_share_one_template():
+    configs = [{"max_iterations": 4, "quality_threshold": 80}, {"quality_threshold": 80, "max_iterations": 4}]
+    graph_ids = [
+        client.post("/graph/create", json={"workflow_type": "code_review", "config": config}).json()["graph_id"]
+        for config in configs
+    ]
+    
+    first, second = (storage.get_graph(graph_id) for graph_id in graph_ids)
+    assert first.graph_id != second.graph_id
+    assert first.template is second.template
+    
+    before = graph_templates.stats()["references"]
+    assert client.delete(f"/graph/{graph_ids[0]}").status_code == 200
+    assert graph_templates.stats()["references"] == before - 1
+    assert client.delete(f"/graph/{graph_ids[0]}").status_code == 404
+    
+    run_resp = client.post("/graph/run", json={
+        "graph_id": graph_ids[1],
+        "initial_state": {"code": "def f():\n    return 1"}
+    })
+    assert run_resp.status_code == 200
+
 def test_run_graph_success():
     create_resp = client.post("/graph/create", json={
         "workflow_type": "code_review",
@@ -118,7 +143,7 @@ def test_list_graphs():
     
     assert response.status_code == 200
     data = response.json()
-    assert data["total"] == 2
+    assert data["count"] == 2
     assert len(data["graphs"]) == 2
 
 def test_list_runs():
@@ -141,7 +166,7 @@ def test_list_runs():
     
     assert response.status_code == 200
     data = response.json()
-    assert data["total"] == 2
+    assert data["count"] == 2
     assert len(data["runs"]) == 2
 
 def test_code_review_workflow_loop():
@@ -176,3 +201,461 @@ def complex_function(a, b, c, d, e, f, g):
     
     assert data["metadata"]["iterations_used"] > 0
     assert "suggestions" in data["final_state"]
+
+def test_create_graph_unknown_executor():
+    response = client.post("/graph/create", json={
+        "workflow_type": "code_review",
+        "config": {"executor": "cluster"}
+    })
+    
+    assert response.status_code == 400
+    assert "Unknown executor type" in response.json()["detail"]
+
+def test_cache_stats_endpoint():
+    response = client.get("/graph/cache/stats")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert "hits" in data
+    assert "misses" in data
+    assert "entries" in data
+
+def test_storage_stats_endpoint():
+    create_resp = client.post("/graph/create", json={
+        "workflow_type": "code_review",
+        "config": {}
+    })
+    graph_id = create_resp.json()["graph_id"]
+    run_resp = client.post("/graph/run", json={
+        "graph_id": graph_id,
+        "initial_state": {"code": "def a(): pass"}
+    })
+    
+    response = client.get("/graph/storage/stats")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["graphs"] == 1
+    assert data["runs"] == 1
+    assert data["run_bytes"] > 0
+    assert data["largest_runs"][0]["run_id"] == run_resp.json()["run_id"]
+    assert "capacity" in data["evictions"]["runs"]
+
+def test_run_batch_returns_per_item_results():
+    create_resp = client.post("/graph/create", json={
+        "workflow_type": "code_review",
+        "config": {}
+    })
+    graph_id = create_resp.json()["graph_id"]
+    
+    response = client.post("/graph/run-batch", json={
+        "graph_id": graph_id,
+        "initial_states": [
+            {"code": f"def func_{i}(a, b):\n    return a + b", "quality_threshold": 50}
+            for i in range(5)
+        ],
+        "concurrency": 2
+    })
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 5
+    assert data["failed"] == 0
+    assert [item["index"] for item in data["results"]] == list(range(5))
+    assert all("quality_score" in item["final_state"] for item in data["results"])
+    
+    run_id = data["results"][3]["run_id"]
+    assert client.get(f"/graph/state/{run_id}").status_code == 200
+
+def test_run_batch_streams_ndjson():
+    create_resp = client.post("/graph/create", json={
+        "workflow_type": "code_review",
+        "config": {}
+    })
+    graph_id = create_resp.json()["graph_id"]
+    
+    response = client.post("/graph/run-batch", json={
+        "graph_id": graph_id,
+        "initial_states": [{"code": "def a(): pass"}, {"code": "def b(): pass"}, {"code": "def c(): pass"}],
+        "stream": True
+    })
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in response.text.splitlines() if line]
+    assert sorted(item["index"] for item in items) == [0, 1, 2]
+    assert all(item["status"] == "completed" for item in items)
+
+def test_run_batch_graph_not_found():
+    response = client.post("/graph/run-batch", json={
+        "graph_id": "non-existent-id",
+        "initial_states": [{"code": "def a(): pass"}]
+    })
+    
+    assert response.status_code == 404
+
+def _parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_run_stream_sends_server_sent_events():
+    create_resp = client.post("/graph/create", json={
+        "workflow_type": "code_review",
+        "config": {}
+    })
+    graph_id = create_resp.json()["graph_id"]
+    
+    response = client.post("/graph/run-stream", json={
+        "graph_id": graph_id,
+        "initial_state": {"code": "def simple_function():\n    return 42", "quality_threshold": 50}
+    })
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "run_start"
+    assert names[-1] == "run_end"
+    assert ("node_end", "extract") in [(name, data.get("node")) for name, data in events]
+    
+    run_id = events[-1][1]["run_id"]
+    assert client.get(f"/graph/state/{run_id}").status_code == 200
+
+def test_events_for_async_run():
+    with TestClient(app) as session:
+        create_resp = session.post("/graph/create", json={
+            "workflow_type": "code_review",
+            "config": {}
+        })
+        graph_id = create_resp.json()["graph_id"]
+        run_resp = session.post("/graph/run-async", json={
+            "graph_id": graph_id,
+            "initial_state": {"code": "def simple_function():\n    return 42"}
+        })
+        run_id = run_resp.json()["run_id"]
+        
+        response = session.get(f"/graph/events/{run_id}")
+        
+        assert response.status_code == 200
+        events = _parse_sse(response.text)
+        assert events[-1][0] == "run_end"
+        assert events[-1][1]["status"] == "completed"
+        assert "quality_score" in events[-1][1]["final_state"]
+        
+        replay = _parse_sse(session.get(f"/graph/events/{run_id}").text)
+        assert replay == [events[-1]]
+        assert session.get("/graph/events/unknown-run").status_code == 404
+
+def test_failed_run_is_stored_and_replayed_as_failed():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    run = client.post("/graph/run", json={"graph_id": graph_id, "initial_state": {"code": 123}}).json()
+    
+    assert run["metadata"]["completed"] is False
+    assert storage.get_run(run["run_id"])["status"] == "failed"
+    assert run["run_id"] in client.get("/graph/runs?status=failed").json()["runs"]
+    replay = _parse_sse(client.get(f"/graph/events/{run['run_id']}").text)
+    assert replay[-1][1]["status"] == "failed"
+
+def test_websocket_run_streams_events():
+    create_resp = client.post("/graph/create", json={
+        "workflow_type": "code_review",
+        "config": {}
+    })
+    graph_id = create_resp.json()["graph_id"]
+    
+    with client.websocket_connect("/graph/ws/run") as websocket:
+        websocket.send_json({"graph_id": graph_id, "initial_state": {"code": "def a(): pass"}})
+        events = []
+        while True:
+            event = websocket.receive_json()
+            events.append(event)
+            if event["event"] == "run_end":
+                break
+    
+    assert events[0]["event"] == "run_start"
+    assert "quality_score" in events[-1]["final_state"]
+
+def test_websocket_unknown_graph():
+    with client.websocket_connect("/graph/ws/run") as websocket:
+        websocket.send_json({"graph_id": "missing", "initial_state": {}})
+        assert websocket.receive_json() == {"event": "error", "error": "Graph not found"}
+
+def test_run_async_is_consumed_by_job_queue():
+    import time
+    with TestClient(app) as session:
+        create_resp = session.post("/graph/create", json={
+            "workflow_type": "code_review",
+            "config": {}
+        })
+        graph_id = create_resp.json()["graph_id"]
+        
+        run_resp = session.post("/graph/run-async", json={
+            "graph_id": graph_id,
+            "initial_state": {"code": "def simple_function():\n    return 42"},
+            "priority": 1
+        })
+        assert run_resp.status_code == 200
+        assert run_resp.json()["status"] == "queued"
+        run_id = run_resp.json()["run_id"]
+        
+        for _ in range(100):
+            state = session.get(f"/graph/state/{run_id}").json()
+            if "quality_score" in state["state"]:
+                break
+            time.sleep(0.02)
+        
+        assert "quality_score" in state["state"]
+        stats = session.get("/graph/queue/stats").json()
+        assert stats["completed"] >= 1
+        assert stats["kind"] == "local"
+
+def test_run_async_returns_429_when_queue_full(monkeypatch):
+    from app.api import routes
+    from app.jobs import LocalJobQueue
+    monkeypatch.setattr(routes, "job_queue", LocalJobQueue(routes.execute_graph_background, workers=0, maxsize=1))
+    
+    with TestClient(app) as session:
+        create_resp = session.post("/graph/create", json={
+            "workflow_type": "code_review",
+            "config": {}
+        })
+        graph_id = create_resp.json()["graph_id"]
+        body = {"graph_id": graph_id, "initial_state": {"code": "def a(): pass"}}
+        
+        assert session.post("/graph/run-async", json=body).status_code == 200
+        response = session.post("/graph/run-async", json=body)
+    
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+
+def test_run_graph_with_profile():
+    create_resp = client.post("/graph/create", json={
+        "workflow_type": "code_review",
+        "config": {}
+    })
+    graph_id = create_resp.json()["graph_id"]
+    
+    response = client.post("/graph/run", json={
+        "graph_id": graph_id,
+        "initial_state": {"code": "def simple_function():\n    return 42", "quality_threshold": 50},
+        "profile": True
+    })
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["metadata"]["node_timings"]) == {"extract", "analyze", "detect", "suggest"}
+    assert len(data["metadata"]["profile"]) > 0
+    assert "duration_ms" in data["execution_log"][0]
+
+def test_metrics_endpoint():
+    create_resp = client.post("/graph/create", json={
+        "workflow_type": "code_review",
+        "config": {}
+    })
+    graph_id = create_resp.json()["graph_id"]
+    client.post("/graph/run", json={
+        "graph_id": graph_id,
+        "initial_state": {"code": "def a(): pass"}
+    })
+    
+    response = client.get("/metrics")
+    
+    assert response.status_code == 200
+    text = response.text
+    assert 'http_requests_total{method="POST",route="/graph/run",status="200"}' in text
+    assert 'workflow_run_duration_seconds_count{workflow_type="code_review"}' in text
+    assert 'workflow_node_duration_seconds_count{workflow_type="code_review",node="extract",status="success"}' in text
+    assert "job_queue_depth 0" in text
+    assert "storage_runs 1" in text
+
+def test_metrics_scrape_reads_storage_stats_once(monkeypatch):
+    calls = []
+    stats = storage.stats
+    monkeypatch.setattr(storage, "stats", lambda **kwargs: calls.append(kwargs) or stats(**kwargs))
+    
+    text = client.get("/metrics").text
+    
+    assert len(calls) == 1
+    assert "storage_graphs 0" in text
+    assert "storage_run_bytes 0" in text
+
+def test_state_history_endpoints():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    code = "def f(x):\n    return x"
+    run = client.post("/graph/run", json={
+        "graph_id": graph_id,
+        "initial_state": {"code": code},
+        "record_history": True
+    }).json()
+    
+    history = client.get(f"/graph/state/{run['run_id']}/history").json()
+    assert history["total"] == len(run["execution_log"])
+    assert history["steps"][0]["node"] == "extract"
+    assert "functions" in history["steps"][0]["changed"]
+    
+    first = client.get(f"/graph/state/{run['run_id']}/history/1").json()
+    assert first["node"] == "extract"
+    assert first["state"]["code"] == code
+    assert "quality_score" not in first["state"]
+    
+    last = client.get(f"/graph/state/{run['run_id']}/history/{history['total']}").json()
+    assert last["state"] == run["final_state"]
+    assert client.get(f"/graph/state/{run['run_id']}/history/999").status_code == 404
+    
+    plain = client.post("/graph/run", json={"graph_id": graph_id, "initial_state": {"code": code}}).json()
+    assert client.get(f"/graph/state/{plain['run_id']}/history").status_code == 409
+
+def test_cancel_run_rejects_unknown_and_finished_runs():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    run = client.post("/graph/run", json={"graph_id": graph_id, "initial_state": {"code": "x = 1"}}).json()
+    
+    assert client.delete("/graph/run/missing").status_code == 404
+    response = client.delete(f"/graph/run/{run['run_id']}")
+    assert response.status_code == 409
+    assert "completed" in response.json()["detail"]
+
+def test_incremental_run_reuses_base_run_analysis():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {"cache": False}}).json()["graph_id"]
+    code = "\n".join(f"def handler_{i}(event):\n    return event.get('id')\n" for i in range(10))
+    
+    base = client.post("/graph/run", json={"graph_id": graph_id, "initial_state": {"code": code}}).json()
+    edited = code.replace("handler_3(event)", "handler_3(event, context)")
+    run = client.post("/graph/run", json={
+        "graph_id": graph_id,
+        "initial_state": {"code": edited, "base_run_id": base["run_id"]}
+    }).json()
+    
+    assert run["final_state"]["reused_blocks"] == 9
+    assert run["final_state"]["function_count"] == 10
+    assert run["final_state"]["code_hash"] != run["final_state"]["base_hash"]
+
+def test_run_projects_fields_and_slims_log():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    run = client.post("/graph/run", json={
+        "graph_id": graph_id,
+        "initial_state": {"code": "def f():\n    return 1\n", "quality_threshold": 0},
+        "fields": ["quality_score", "suggestions", "missing"],
+        "log_level": "summary"
+    }).json()
+    
+    assert set(run["final_state"]) == {"quality_score", "suggestions"}
+    assert run["execution_log"]
+    assert all(set(entry) <= {"node", "status", "iteration", "error"} for entry in run["execution_log"])
+    
+    stored = storage.get_run(run["run_id"])
+    assert set(stored["state"]) == {"quality_score", "suggestions"}
+    assert "timestamp" not in stored["log"][0]
+
+def test_run_excludes_inputs_and_drops_log():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    run = client.post("/graph/run", json={
+        "graph_id": graph_id,
+        "initial_state": {"code": "def f():\n    return 1\n", "quality_threshold": 0},
+        "exclude_inputs": True,
+        "log_level": "none"
+    }).json()
+    
+    assert "code" not in run["final_state"]
+    assert "quality_threshold" not in run["final_state"]
+    assert "quality_score" in run["final_state"]
+    assert run["execution_log"] == []
+    assert "code" not in storage.get_run(run["run_id"])["state"]
+
+def test_state_projection_options():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    run = client.post("/graph/run", json={
+        "graph_id": graph_id,
+        "initial_state": {"code": "def f():\n    return 1\n", "quality_threshold": 0}
+    }).json()
+    
+    full = client.get(f"/graph/state/{run['run_id']}").json()
+    assert "code" in full["state"]
+    assert full["execution_log"] is None
+    
+    slim = client.get(f"/graph/state/{run['run_id']}", params={"fields": "quality_score,code", "exclude_inputs": True}).json()
+    assert slim["state"] == {"quality_score": run["final_state"]["quality_score"]}
+    
+    logged = client.get(f"/graph/state/{run['run_id']}", params={"log_level": "summary"}).json()
+    assert [entry["node"] for entry in logged["execution_log"]] == [entry["node"] for entry in run["execution_log"]]
+    assert client.get(f"/graph/state/{run['run_id']}", params={"log_level": "verbose"}).status_code == 422
+
+def test_fast_responses_match_validated_responses():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    body = {"graph_id": graph_id, "initial_state": {"code": "def f(a, b):\n    return a + b\n", "quality_threshold": 0}}
+    
+    slow = client.post("/graph/run", json=body).json()
+    fast = client.post("/graph/run", params={"fast": True}, json=body)
+    
+    assert fast.headers["content-type"] == "application/json"
+    fast = fast.json()
+    assert fast["final_state"] == slow["final_state"]
+    assert [entry["node"] for entry in fast["execution_log"]] == [entry["node"] for entry in slow["execution_log"]]
+    
+    params = {"fields": "quality_score", "log_level": "summary"}
+    assert (client.get(f"/graph/state/{fast['run_id']}", params={**params, "fast": True}).json()
+            == client.get(f"/graph/state/{fast['run_id']}", params=params).json())
+
+def test_fast_json_falls_back_to_stdlib():
+    assert json.loads(responses.dumps({"big": 2 ** 70, 1: "x"})) == {"big": 2 ** 70, "1": "x"}
+
+def test_list_runs_pages_with_cursor_and_filters():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    run_ids = [
+        client.post("/graph/run", json={"graph_id": graph_id, "initial_state": {"code": f"x = {i}"}}).json()["run_id"]
+        for i in range(3)
+    ]
+    
+    first = client.get("/graph/runs", params={"limit": 2}).json()
+    assert first["runs"] == run_ids[:2]
+    assert "total" not in first
+    assert first["count"] == 2
+    second = client.get("/graph/runs", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert second == {"runs": run_ids[2:], "count": 1, "next_cursor": None}
+    
+    newest = client.get("/graph/runs", params={"order": "desc", "graph_id": graph_id, "status": "completed"}).json()
+    assert newest["runs"] == run_ids[::-1]
+    assert client.get("/graph/runs", params={"graph_id": "other"}).json()["runs"] == []
+    assert client.get("/graph/runs", params={"cursor": "bogus"}).status_code == 400
+    assert client.get("/graph/list", params={"limit": 0}).status_code == 422
+    assert client.get("/graph/list", params={"workflow_type": "code_review"}).json()["graphs"] == [graph_id]
+
+def test_identical_runs_are_coalesced_with_distinct_run_ids():
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    body = {"graph_id": graph_id, "initial_state": {"code": "def coalesced():\n    return 1\n", "quality_threshold": 0}}
+    before = client.get("/graph/coalesce/stats").json()
+    
+    first = client.post("/graph/run", json=body).json()
+    second = client.post("/graph/run", json=body).json()
+    
+    assert first["run_id"] != second["run_id"]
+    assert second["final_state"] == first["final_state"]
+    assert second["metadata"]["run_id"] == second["run_id"]
+    assert second["metadata"]["coalesced"] == "cached"
+    assert second["metadata"]["coalesced_from"] == first["run_id"]
+    assert storage.get_run(second["run_id"])["metadata"]["coalesced_from"] == first["run_id"]
+    
+    after = client.get("/graph/coalesce/stats").json()
+    assert after["executions"] - before["executions"] == 1
+    assert after["hits"] - before["hits"] == 1
+    
+    for options in ({"coalesce": False}, {"profile": True}, {"record_history": True}):
+        assert "coalesced" not in client.post("/graph/run", json={**body, **options}).json()["metadata"]
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_runs_execute_once():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as session:
+        graph_id = (await session.post("/graph/create", json={"workflow_type": "code_review", "config": {}})).json()["graph_id"]
+        body = {"graph_id": graph_id, "initial_state": {"code": "def burst():\n    return 2\n"}}
+        before = (await session.get("/graph/coalesce/stats")).json()
+        
+        responses = await asyncio.gather(*(session.post("/graph/run", json=body) for _ in range(8)))
+        
+        after = (await session.get("/graph/coalesce/stats")).json()
+    runs = [response.json() for response in responses]
+    assert len({run["run_id"] for run in runs}) == 8
+    assert after["executions"] - before["executions"] == 1
+    assert sum(1 for run in runs if "coalesced" in run["metadata"]) == 7
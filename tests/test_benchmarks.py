@@ -0,0 +1,23 @@
+import json
+from app.storage import storage
+from benchmarks import load
+
+def test_percentile_uses_nearest_rank():
+    ordered = [float(value) for value in range(1, 101)]
+    
+    assert load.percentile(ordered, 0.50) == 50
+    assert load.percentile(ordered, 0.99) == 99
+    assert load.percentile([], 0.95) == 0.0
+
+def test_load_harness_writes_results(tmp_path):
+    output = tmp_path / "load.json"
+    
+    assert load.main(["--requests", "6", "--concurrency", "3", "--output", str(output)]) == 0
+    
+    results = json.loads(output.read_text())
+    assert set(results["scenarios"]) == {"run", "run-async", "state"}
+    for summary in results["scenarios"].values():
+        assert summary["requests"] == 6
+        assert summary["errors"] == 0
+        assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"]
+    storage.clear()
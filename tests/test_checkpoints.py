@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.checkpoints import FileCheckpointStore, SQLiteCheckpointStore, checkpoint_store
+from app.engine.graph import WorkflowGraph
+from app.engine.state import WorkflowState
+from app.main import app
+from app.workflows.code_review import extract_node
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "file":
+        return FileCheckpointStore(str(tmp_path / "checkpoints"))
+    return SQLiteCheckpointStore(str(tmp_path / "checkpoints.db"))
+
+def test_store_round_trip(store):
+    store.start("run-1", {"graph_id": "g", "initial_state": {"x": 1}})
+    store.append("run-1", {"delta": {"y": 2}, "next": "b", "iterations": 1, "iteration": 0, "log": []})
+    
+    saved = store.load("run-1")
+    assert saved["header"]["initial_state"] == {"x": 1}
+    assert [step["delta"] for step in saved["steps"]] == [{"y": 2}]
+    
+    store.delete("run-1")
+    assert store.load("run-1") is None
+    assert store.load("../etc/passwd") is None
+
+@pytest.mark.asyncio
+async def test_resume_continues_after_last_completed_node(store):
+    calls = []
+    
+    def expensive(state):
+        calls.append("expensive")
+        return {"parsed": state.get("raw") * 2}
+    
+    def flaky(state):
+        calls.append("flaky")
+        if calls.count("flaky") == 1:
+            raise RuntimeError("worker died")
+        return {"done": state.get("parsed") + 1}
+    
+    graph = WorkflowGraph()
+    graph.add_node("expensive", expensive)
+    graph.add_node("flaky", flaky)
+    graph.add_edge("expensive", "flaky")
+    
+    state, log = await graph.run({"raw": 5}, "run-1", checkpoint=store)
+    assert state.metadata["completed"] is False
+    assert [step["next"] for step in store.load("run-1")["steps"]] == ["flaky"]
+    
+    state, log = await graph.run(None, "run-1", checkpoint=store, resume=True)
+    
+    assert state.data == {"raw": 5, "parsed": 10, "done": 11}
+    assert calls == ["expensive", "flaky", "flaky"]
+    assert [entry["node"] for entry in log] == ["expensive", "flaky"]
+    assert state.metadata["resumed_from_step"] == 1
+    assert store.load("run-1") is None
+
+def test_resume_endpoint_continues_from_checkpoint():
+    client = TestClient(app)
+    graph_id = client.post("/graph/create", json={"workflow_type": "code_review", "config": {}}).json()["graph_id"]
+    code = "def f(x):\n    return x"
+    extract_entry = {"node": "extract", "status": "success", "iteration": 0, "timestamp": "2024-01-01T00:00:00"}
+    
+    checkpoint_store.start("resume-run", {"graph_id": graph_id, "initial_state": {"code": code}})
+    checkpoint_store.append("resume-run", {
+        "delta": extract_node(WorkflowState(data={"code": code})),
+        "next": ["analyze", "detect"],
+        "iterations": 1,
+        "iteration": 0,
+        "log": [extract_entry]
+    })
+    
+    response = client.post("/graph/resume/resume-run")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["execution_log"][0] == extract_entry
+    assert [entry["node"] for entry in data["execution_log"][1:3]] == ["analyze", "detect"]
+    assert "quality_score" in data["final_state"]
+    assert client.get("/graph/state/resume-run").json()["state"] == data["final_state"]
+    assert client.post("/graph/resume/resume-run").status_code == 404
@@ -1,7 +1,16 @@
+import asyncio
+import os
+import threading
+import time
 import pytest
 from app.engine.node import Node
 from app.engine.state import WorkflowState
-from app.engine.graph import WorkflowGraph
+from app.engine.graph import GraphValidationError, WorkflowGraph
+from app.engine.cache import NodeCache
+from app.engine.coalesce import RunCoalescer
+from app.engine.executors import run_killable
+from app.engine.events import EventBus
+from app.engine.history import state_at
 
 @pytest.mark.asyncio
 async def test_node_execution():
@@ -42,6 +51,19 @@ def test_state_operations():
     assert state.get("key3") == "value3"
     assert state.get("key4") == "value4"
 
+def test_state_copies_input_and_forks_data():
+    initial = {"key": 1}
+    state = WorkflowState(data=initial)
+    state.set("key", 2)
+    branch = state.fork()
+    branch.set("key", 3)
+    
+    assert initial == {"key": 1}
+    assert state.get("key") == 2
+    assert branch.get("key") == 3
+    with pytest.raises(AttributeError):
+        state.extra = True
+
 @pytest.mark.asyncio
 async def test_graph_linear_execution():
     def step1(state):
@@ -150,3 +172,584 @@ async def test_graph_error_handling():
     assert log[0]["status"] == "error"
     assert "Intentional error" in log[0]["error"]
     assert len(log) == 1
+
+def record_process(state):
+    return {"pid": os.getpid()}
+
+@pytest.mark.asyncio
+async def test_async_node_is_awaited():
+    async def fetch(state):
+        await asyncio.sleep(0)
+        return {"fetched": True}
+    
+    node = Node(name="fetch", func=fetch)
+    assert node.kind == "async"
+    
+    state = await node.execute(WorkflowState(data={}))
+    assert state.data["fetched"] is True
+
+@pytest.mark.asyncio
+async def test_cpu_node_runs_off_event_loop():
+    def where(state):
+        return {"thread": threading.current_thread().name}
+    
+    graph = WorkflowGraph(executor="thread")
+    graph.add_node("where", where, kind="cpu")
+    
+    state, log = await graph.run({})
+    
+    assert log[0]["status"] == "success"
+    assert state.data["thread"] != threading.current_thread().name
+
+@pytest.mark.asyncio
+async def test_inline_executor_keeps_cpu_node_on_loop():
+    def where(state):
+        return {"thread": threading.current_thread().name}
+    
+    graph = WorkflowGraph(executor="inline")
+    graph.add_node("where", where, kind="cpu")
+    
+    state, log = await graph.run({})
+    
+    assert state.data["thread"] == threading.current_thread().name
+
+@pytest.mark.asyncio
+async def test_process_executor_runs_cpu_node_in_worker():
+    graph = WorkflowGraph(executor="process")
+    graph.add_node("record", record_process, kind="cpu")
+    
+    state, log = await graph.run({})
+    
+    assert log[0]["status"] == "success"
+    assert state.data["pid"] != os.getpid()
+
+def test_unknown_node_kind_and_executor_rejected():
+    with pytest.raises(ValueError):
+        Node(name="bad", func=lambda state: None, kind="gpu")
+    with pytest.raises(ValueError):
+        WorkflowGraph(executor="cluster")
+
+@pytest.mark.asyncio
+async def test_graph_fan_out_runs_branches_concurrently():
+    async def left(state):
+        await asyncio.sleep(0.05)
+        return {"left": state.get("seed") + 1}
+    
+    async def right(state):
+        await asyncio.sleep(0.05)
+        return {"right": state.get("seed") + 2}
+    
+    def combine(state):
+        return {"total": state.get("left") + state.get("right")}
+    
+    graph = WorkflowGraph()
+    graph.add_node("start", lambda state: {"seed": 1})
+    graph.add_node("left", left)
+    graph.add_node("right", right)
+    graph.add_join("combine", combine)
+    graph.add_edge("start", ["left", "right"])
+    graph.add_edge("left", "combine")
+    graph.add_edge("right", "combine")
+    
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    state, log = await graph.run({})
+    elapsed = loop.time() - started
+    
+    assert state.data["total"] == 5
+    assert [entry["node"] for entry in log] == ["start", "left", "right", "combine"]
+    assert log[1]["branch"] == "left"
+    assert elapsed < 0.09
+
+@pytest.mark.asyncio
+async def test_graph_join_conflict_policy():
+    def build(conflict):
+        graph = WorkflowGraph()
+        graph.add_node("start", lambda state: {})
+        graph.add_node("a", lambda state: {"value": "a"})
+        graph.add_node("b", lambda state: {"value": "b"})
+        graph.add_join("join", conflict=conflict)
+        graph.add_edge("start", ["a", "b"])
+        graph.add_edge("a", "join")
+        graph.add_edge("b", "join")
+        return graph
+    
+    state, log = await build("error").run({})
+    assert log[-1]["status"] == "error"
+    assert "Conflicting updates for 'value'" in log[-1]["error"]
+    
+    state, log = await build("first").run({})
+    assert state.data["value"] == "a"
+    
+    state, log = await build("last").run({})
+    assert state.data["value"] == "b"
+    assert state.metadata["completed"] is True
+
+@pytest.mark.asyncio
+async def test_graph_branch_error_stops_run():
+    def failing(state):
+        raise ValueError("branch failed")
+    
+    graph = WorkflowGraph()
+    graph.add_node("start", lambda state: {})
+    graph.add_node("ok", lambda state: {"ok": True})
+    graph.add_node("fail", failing)
+    graph.add_join("join", lambda state: {"joined": True})
+    graph.add_edge("start", ["ok", "fail"])
+    graph.add_edge("ok", "join")
+    graph.add_edge("fail", "join")
+    
+    state, log = await graph.run({})
+    
+    assert "joined" not in state.data
+    assert "ok" not in state.data
+    assert log[-1]["status"] == "error"
+    assert log[-1]["branch"] == "fail"
+
+@pytest.mark.asyncio
+async def test_cached_node_skips_recomputation():
+    calls = []
+    
+    def expensive(state):
+        calls.append(state.get("code"))
+        return {"length": len(state.get("code"))}
+    
+    def loop_twice(state):
+        state.iteration += 1
+        return "expensive" if state.iteration < 2 else None
+    
+    graph = WorkflowGraph()
+    graph.cache = NodeCache()
+    graph.add_node("expensive", expensive, inputs=["code"], cached=True)
+    graph.add_conditional_edge("expensive", loop_twice)
+    
+    state, log = await graph.run({"code": "abc"})
+    await graph.run({"code": "abc", "unrelated": 1})
+    
+    assert state.data["length"] == 3
+    assert calls == ["abc"]
+    assert log[1]["cached"] is True
+    assert graph.cache.stats()["hits"] == 3
+    assert graph.cache.stats()["misses"] == 1
+
+def test_node_cache_lru_and_size_eviction():
+    cache = NodeCache(max_entries=2, max_bytes=1000)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    
+    cache.put("big", {"v": "x" * 2000})
+    assert cache.get("big") is None
+    
+    cache.put("d", {"v": "x" * 600})
+    cache.put("e", {"v": "y" * 600})
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["bytes"] <= 1000
+    assert stats["evictions"] == 4
+
+@pytest.mark.asyncio
+async def test_graph_stream_yields_events_in_order():
+    def failing(state):
+        raise ValueError("boom")
+    
+    graph = WorkflowGraph()
+    graph.add_node("first", lambda state: {"a": 1})
+    graph.add_node("skipped", lambda state: {}, condition=lambda state: False)
+    graph.add_node("fail", failing)
+    graph.add_edge("first", "skipped")
+    graph.add_edge("skipped", "fail")
+    
+    events = [event async for event in graph.stream({}, "run-1")]
+    
+    assert [event["event"] for event in events] == [
+        "run_start", "node_start", "node_end", "node_skip", "node_start", "node_error", "run_end"
+    ]
+    assert events[2]["node"] == "first"
+    assert events[5]["error"] == "boom"
+    assert events[-1]["run_id"] == "run-1"
+    assert events[-1]["status"] == "failed"
+    assert events[-1]["final_state"] == {"a": 1}
+
+@pytest.mark.asyncio
+async def test_event_bus_replays_history_to_late_subscribers():
+    bus = EventBus()
+    emit = bus.emitter("run-1")
+    emit({"event": "run_start"})
+    
+    queue = bus.subscribe("run-1")
+    emit({"event": "node_end", "node": "a"})
+    emit({"event": "run_end"})
+    
+    received = []
+    while (event := await queue.get()) is not None:
+        received.append(event["event"])
+    
+    assert received == ["run_start", "node_end", "run_end"]
+    assert bus.subscribe("run-1") is None
+
+def busy(state):
+    return {"total": sum(i * i for i in range(20000)), "buffer": [0] * 50000}
+
+@pytest.mark.asyncio
+async def test_execution_log_records_node_timings():
+    graph = WorkflowGraph(executor="thread")
+    graph.add_node("busy", busy, kind="cpu")
+    graph.add_node("after", lambda state: {"done": True})
+    graph.add_edge("busy", "after")
+    
+    state, log = await graph.run({}, trace_memory=True)
+    
+    entry = log[0]
+    assert entry["ended_at"] >= entry["started_at"]
+    assert entry["duration_ms"] > 0
+    assert entry["cpu_time_ms"] > 0
+    assert entry["memory_peak_kb"] > 300
+    assert "memory_peak_kb" in log[1]
+    assert state.metadata["node_timings"]["busy"]["calls"] == 1
+    assert "profile" not in state.metadata
+
+@pytest.mark.asyncio
+async def test_overlapping_branches_report_process_memory_peak():
+    import tracemalloc
+    barrier = threading.Barrier(2, timeout=5)
+    
+    def branch(state):
+        barrier.wait()
+        data = [0] * 50000
+        barrier.wait()
+        return {threading.current_thread().name: len(data)}
+    
+    graph = WorkflowGraph(executor="thread")
+    graph.add_node("start", lambda state: {})
+    graph.add_node("left", branch, kind="cpu")
+    graph.add_node("right", branch, kind="cpu")
+    graph.add_join("combine", lambda state: {"done": True})
+    graph.add_edge("start", ["left", "right"])
+    graph.add_edge("left", "combine")
+    graph.add_edge("right", "combine")
+    
+    state, log = await graph.run({}, trace_memory=True)
+    
+    branches = [entry for entry in log if entry["node"] in ("left", "right")]
+    assert len(branches) == 2
+    assert all(entry["process_memory_peak_kb"] > 300 for entry in branches)
+    assert all("memory_peak_kb" not in entry for entry in branches)
+    assert "memory_peak_kb" in log[0]
+    assert not tracemalloc.is_tracing()
+
+@pytest.mark.asyncio
+async def test_profile_mode_reports_hot_functions():
+    graph = WorkflowGraph(executor="thread")
+    graph.add_node("busy", busy, kind="cpu")
+    
+    state, log = await graph.run({}, profile=True)
+    
+    hot = state.metadata["profile"]
+    assert any("busy" in item["function"] for item in hot)
+    assert all(set(item) == {"function", "calls", "total_ms", "cumulative_ms"} for item in hot)
+    assert "profile" not in log[0]
+
+@pytest.mark.asyncio
+async def test_profile_mode_does_not_rerun_failing_node():
+    calls = []
+    
+    def failing(state):
+        calls.append(1)
+        raise ValueError("bad input")
+    
+    graph = WorkflowGraph()
+    graph.add_node("failing", failing)
+    
+    state, log = await graph.run({}, profile=True)
+    
+    assert len(calls) == 1
+    assert log[0]["status"] == "error"
+
+def test_compile_rejects_broken_wiring():
+    graph = WorkflowGraph()
+    graph.add_node("a", lambda state: {})
+    graph.add_edge("a", "missing")
+    with pytest.raises(GraphValidationError, match="unknown node"):
+        graph.compile()
+    
+    graph = WorkflowGraph()
+    graph.add_node("a", lambda state: {})
+    graph.add_node("orphan", lambda state: {})
+    with pytest.raises(GraphValidationError, match="Unreachable nodes: orphan"):
+        graph.compile()
+    
+    graph = WorkflowGraph()
+    graph.add_node("start", lambda state: {})
+    graph.add_node("left", lambda state: {})
+    graph.add_node("right", lambda state: {})
+    graph.add_join("join")
+    graph.add_edge("start", ["left", "right"])
+    graph.add_edge("left", "join")
+    with pytest.raises(GraphValidationError, match="converge"):
+        graph.compile()
+
+def test_compiled_plan_is_cached_and_immutable():
+    graph = WorkflowGraph()
+    graph.add_node("a", lambda state: {})
+    graph.add_node("b", lambda state: {})
+    graph.add_edge("a", "b")
+    
+    plan = graph.compile()
+    assert graph.compile() is plan
+    assert plan.successors == (1, None)
+    with pytest.raises(AttributeError):
+        plan.max_iterations = 1
+    
+    graph.max_iterations = 5
+    assert graph.compile() is not plan
+    assert graph.compile().max_iterations == 5
+
+@pytest.mark.asyncio
+async def test_unknown_conditional_target_is_logged_as_error():
+    graph = WorkflowGraph()
+    graph.add_node("a", lambda state: {"seen": True})
+    graph.add_node("b", lambda state: {})
+    graph.add_conditional_edge("a", lambda state: "nowhere")
+    
+    state, log = await graph.run({})
+    
+    assert log[-1]["status"] == "error"
+    assert log[-1]["error"] == "Unknown node: nowhere"
+    assert state.metadata["completed"] is False
+    
+    graph = WorkflowGraph()
+    graph.add_node("a", lambda state: {})
+    graph.add_node("b", lambda state: {})
+    graph.add_conditional_edge("a", lambda state: "a", targets=["b"])
+    
+    state, log = await graph.run({})
+    
+    assert "undeclared target 'a'" in log[-1]["error"]
+
+@pytest.mark.asyncio
+async def test_history_deltas_reconstruct_every_step():
+    big = "x" * 100000
+    graph = WorkflowGraph()
+    graph.add_node("start", lambda state: {"step": 1})
+    graph.add_node("a", lambda state: {"shared": "a", "a": True})
+    graph.add_node("b", lambda state: {"shared": "b", "b": True})
+    graph.add_join("join", lambda state: {"step": 2}, conflict="first")
+    graph.add_edge("start", ["a", "b"])
+    graph.add_edge("a", "join")
+    graph.add_edge("b", "join")
+    
+    initial = {"code": big}
+    state, log = await graph.run(initial, record_history=True)
+    
+    assert log[0]["delta"] == {"step": 1}
+    assert "code" not in log[0]["delta"]
+    assert state_at(initial, log, 0) == initial
+    assert state_at(initial, log, 1) == {"code": big, "step": 1}
+    assert state_at(initial, log, len(log)) == state.data
+    assert state_at(initial, log, len(log))["shared"] == "a"
+    assert state_at(initial, log, len(log))["code"] is big
+    
+    _, plain_log = await graph.run(initial)
+    assert all("delta" not in entry for entry in plain_log)
+
+@pytest.mark.asyncio
+async def test_node_retries_with_backoff_then_succeeds():
+    attempts = []
+    
+    async def flaky(state):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("transient")
+        return {"ok": True}
+    
+    graph = WorkflowGraph()
+    graph.add_node("flaky", flaky, retries=2, backoff=0.01)
+    
+    state, log = await graph.run({})
+    
+    assert state.data["ok"] is True
+    assert log[0]["status"] == "success"
+    assert log[0]["attempts"] == 3
+
+@pytest.mark.asyncio
+async def test_node_timeout_and_run_deadline():
+    async def slow(state):
+        await asyncio.sleep(1)
+        return {"slow": True}
+    
+    graph = WorkflowGraph()
+    graph.add_node("slow", slow, timeout=0.05)
+    state, log = await graph.run({})
+    assert log[0]["status"] == "error"
+    assert "timed out after 0.05s" in log[0]["error"]
+    
+    async def nap(state):
+        await asyncio.sleep(0.1)
+        return {"naps": state.get("naps", 0) + 1}
+    
+    graph = WorkflowGraph()
+    graph.add_node("first", nap)
+    graph.add_node("second", nap)
+    graph.add_edge("first", "second")
+    state, log = await graph.run({}, deadline=0.15)
+    
+    assert state.data["naps"] == 1
+    assert log[-1]["error"] == "Run deadline exceeded"
+    assert log[-1]["duration_ms"] < 100
+    assert state.metadata["completed"] is False
+
+def sleep_and_record_pid(path):
+    with open(path, "w") as f:
+        f.write(str(os.getpid()))
+    time.sleep(10)
+    return {"slept": True}
+
+def slow_node(state):
+    return sleep_and_record_pid(state.get("path"))
+
+def assert_process_gone(path):
+    with open(path) as f:
+        pid = int(f.read())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
+
+@pytest.mark.asyncio
+async def test_thread_node_timeout_is_not_retried():
+    calls = []
+    
+    def slow(state):
+        calls.append(1)
+        time.sleep(0.3)
+        return {"slow": True}
+    
+    graph = WorkflowGraph(executor="thread")
+    graph.add_node("slow", slow, kind="io", timeout=0.1, retries=2)
+    state, log = await graph.run({})
+    
+    assert log[0]["status"] == "error"
+    assert log[0]["attempts"] == 1
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_timeout_error_raised_by_node_is_retried():
+    attempts = []
+    
+    def flaky(state):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TimeoutError("upstream timed out")
+        return {"ok": True}
+    
+    graph = WorkflowGraph(executor="thread")
+    graph.add_node("flaky", flaky, kind="io", timeout=5, retries=3)
+    state, log = await graph.run({})
+    
+    assert state.data["ok"] is True
+    assert log[0]["attempts"] == 3
+
+@pytest.mark.asyncio
+async def test_process_node_timeout_kills_worker(tmp_path):
+    path = str(tmp_path / "pid")
+    graph = WorkflowGraph(executor="process")
+    graph.add_node("slow", slow_node, kind="cpu", timeout=0.5)
+    
+    started = time.monotonic()
+    state, log = await graph.run({"path": path})
+    
+    assert log[0]["status"] == "error"
+    assert "timed out" in log[0]["error"]
+    assert time.monotonic() - started < 5
+    assert_process_gone(path)
+
+@pytest.mark.asyncio
+async def test_cancelled_killable_call_kills_process(tmp_path):
+    path = str(tmp_path / "pid")
+    task = asyncio.ensure_future(run_killable(sleep_and_record_pid, path))
+    while not os.path.exists(path) or not os.path.getsize(path):
+        await asyncio.sleep(0.01)
+    
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert_process_gone(path)
+    
+    assert await run_killable(sum, [1, 2, 3]) == 6
+    with pytest.raises(ZeroDivisionError):
+        await run_killable(divmod, 1, 0)
+    assert await run_killable(os.getpid) == await run_killable(os.getpid)
+
+@pytest.mark.asyncio
+async def test_coalescer_shares_inflight_execution_and_caches_result():
+    coalescer = RunCoalescer(ttl_seconds=60)
+    calls = []
+    
+    async def execute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"score": 90}
+    
+    key = coalescer.make_key("g", {"b": 1, "a": [1, 2]})
+    assert key == coalescer.make_key("g", {"a": [1, 2], "b": 1})
+    assert key != coalescer.make_key("other", {"a": [1, 2], "b": 1})
+    
+    results = await asyncio.gather(*(coalescer.run(key, execute) for _ in range(5)))
+    
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == ["coalesced"] * 4 + ["executed"]
+    assert all(result == {"score": 90} for result, _ in results)
+    assert await coalescer.run(key, execute) == ({"score": 90}, "cached")
+    assert coalescer.stats()["inflight"] == 0
+
+@pytest.mark.asyncio
+async def test_coalescer_does_not_cache_failures_or_rejected_results():
+    coalescer = RunCoalescer(ttl_seconds=60)
+    
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+    
+    results = await asyncio.gather(coalescer.run("k", fail), coalescer.run("k", fail), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    
+    async def partial():
+        return {"completed": False}
+    
+    assert (await coalescer.run("k", partial, cacheable=lambda result: result["completed"]))[1] == "executed"
+    assert (await coalescer.run("k", partial, cacheable=lambda result: result["completed"]))[1] == "executed"
+    assert coalescer.stats()["cached"] == 0
+
+@pytest.mark.asyncio
+async def test_coalescer_purges_expired_results_and_caps_bytes():
+    coalescer = RunCoalescer(ttl_seconds=0.05, max_bytes=100)
+    
+    async def small():
+        return {"value": "x" * 10}
+    
+    await coalescer.run("a", small)
+    await coalescer.run("b", small)
+    assert coalescer.stats()["cached"] == 2
+    
+    await asyncio.sleep(0.06)
+    coalescer.ttl_seconds = 60
+    await coalescer.run("c", small)
+    assert list(coalescer._results) == ["c"]
+    assert coalescer.stats()["bytes"] == len('{"value": "xxxxxxxxxx"}')
+    
+    async def large():
+        return {"value": "x" * 60}
+    
+    await coalescer.run("d", large)
+    await coalescer.run("e", large)
+    assert list(coalescer._results) == ["e"]
+    assert coalescer.stats()["bytes"] <= 100
+    
+    async def huge():
+        return {"value": "x" * 200}
+    
+    await coalescer.run("f", huge)
+    assert "f" not in coalescer._results
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from app.jobs import Job, LocalJobQueue, ProcessJobQueue, QueueFullError
+from app.jobs.process import _run_graph_in_process
+from app.workflows import build_workflow
+
+@pytest.mark.asyncio
+async def test_local_queue_runs_jobs_by_priority():
+    order = []
+    
+    async def handler(graph_id, initial_state, run_id, runner, options=None):
+        order.append(run_id)
+    
+    queue = LocalJobQueue(handler, workers=1, maxsize=10)
+    queue.submit(Job("low", "g", {}, priority=5))
+    queue.submit(Job("high", "g", {}, priority=0))
+    queue.submit(Job("mid", "g", {}, priority=1))
+    
+    await queue._queue.join()
+    await queue.stop()
+    
+    assert order == ["high", "mid", "low"]
+    stats = queue.stats()
+    assert stats["completed"] == 3
+    assert stats["wait_latency"]["count"] == 3
+
+@pytest.mark.asyncio
+async def test_local_queue_rejects_when_full_and_counts_failures():
+    async def handler(graph_id, initial_state, run_id, runner, options=None):
+        raise RuntimeError("boom")
+    
+    queue = LocalJobQueue(handler, workers=1, maxsize=1)
+    queue.submit(Job("a", "g", {}))
+    with pytest.raises(QueueFullError):
+        queue.submit(Job("b", "g", {}))
+    
+    await queue._queue.join()
+    await queue.stop()
+    
+    stats = queue.stats()
+    assert stats["rejected"] == 1
+    assert stats["failed"] == 1
+
+@pytest.mark.asyncio
+async def test_process_queue_runs_graph_in_worker_process():
+    results = {}
+    events = []
+    
+    async def handler(graph_id, initial_state, run_id, runner, options=None):
+        graph = build_workflow("code_review", graph_id, {})
+        results[run_id] = await runner(graph, initial_state, run_id, events.append)
+    
+    queue = ProcessJobQueue(handler, workers=1, maxsize=4)
+    queue.submit(Job("r1", "g", {"code": "def simple_function():\n    return 42", "quality_threshold": 50}))
+    
+    await queue._queue.join()
+    await queue.stop()
+    
+    state, log = results["r1"]
+    assert "quality_score" in state.data
+    assert state.metadata["run_id"] == "r1"
+    assert [event["event"] for event in events] == ["run_start", "run_end"]
+    assert events[-1]["status"] == "completed"
+
+def test_process_worker_reuses_graph_but_keeps_each_graph_id():
+    headers = {}
+    
+    class RecordingStore:
+        def start(self, run_id, header):
+            headers[run_id] = header
+        
+        def append(self, run_id, record):
+            pass
+        
+        def delete(self, run_id):
+            pass
+    
+    code = {"code": "def simple_function():\n    return 42", "quality_threshold": 50}
+    for graph_id, run_id in (("first", "r1"), ("second", "r2")):
+        _run_graph_in_process("code_review", {}, graph_id, code, run_id, {"checkpoint": RecordingStore()})
+    
+    assert headers["r1"]["graph_id"] == "first"
+    assert headers["r2"]["graph_id"] == "second"
+
+@pytest.mark.asyncio
+async def test_cancel_stops_running_job_and_skips_queued_one():
+    started = asyncio.Event()
+    finished = []
+    
+    async def handler(graph_id, initial_state, run_id, runner, options=None):
+        started.set()
+        await asyncio.sleep(10)
+        finished.append(run_id)
+    
+    queue = LocalJobQueue(handler, workers=1, maxsize=10)
+    queue.submit(Job("running", "g", {}))
+    queue.submit(Job("queued", "g", {}))
+    await started.wait()
+    
+    assert await queue.cancel("queued") == "queued"
+    assert await queue.cancel("running") == "running"
+    assert await queue.cancel("unknown") is None
+    await queue._queue.join()
+    
+    assert queue.running == 0
+    assert finished == []
+    assert queue.stats()["cancelled"] == 2
+    await queue.stop()
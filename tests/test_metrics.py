@@ -0,0 +1,46 @@
+from app.metrics import MetricsRegistry
+
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    registry.gauge("depth", "Queue depth", callback=lambda: 7)
+    
+    text = registry.render()
+    
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a"} 3' in text
+    assert "depth 7" in text
+    assert registry.counter("requests_total", "Requests", ("route",)) is requests
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("node",), buckets=(0.1, 1.0))
+    latency.observe(0.05, node="extract")
+    latency.observe(0.1, node="extract")
+    latency.observe(5, node="extract")
+    
+    text = registry.render()
+    
+    assert 'latency_seconds_bucket{node="extract",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{node="extract",le="1"} 2' in text
+    assert 'latency_seconds_bucket{node="extract",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{node="extract"} 3' in text
+    assert latency.count(node="extract") == 3
+
+def test_collectors_run_once_per_render():
+    registry = MetricsRegistry()
+    size = registry.gauge("size", "Size")
+    calls = []
+    
+    def collect():
+        calls.append(1)
+        size.set(len(calls))
+    
+    registry.collector(collect)
+    registry.collector(lambda: 1 / 0)
+    
+    assert "size 1" in registry.render()
+    assert "size 2" in registry.render()
+    assert len(calls) == 2
@@ -0,0 +1,168 @@
+import time
+import pytest
+from app.storage import storage, create_storage, SQLiteStorage
+from app.workflows import build_workflow
+
+@pytest.fixture(autouse=True)
+def isolated_storage():
+    limits = (storage.max_graphs, storage.max_runs, storage.max_bytes, storage.ttl_seconds)
+    storage.clear()
+    yield
+    storage.configure(*limits)
+    storage.clear()
+
+def test_run_capacity_evicts_least_recently_used():
+    storage.configure(max_runs=2)
+    
+    storage.add_run("a", {"state": {}})
+    storage.add_run("b", {"state": {}})
+    storage.get_run("a")
+    storage.add_run("c", {"state": {}})
+    
+    assert storage.get_run("b") is None
+    assert storage.list_runs() == ["a", "c"]
+    assert storage.stats()["evictions"]["runs"]["capacity"] >= 1
+
+def test_run_bytes_limit_and_size_accounting():
+    storage.configure(max_bytes=1000)
+    
+    storage.add_run("a", {"state": {"code": "x" * 600}})
+    assert storage.stats()["run_bytes"] > 600
+    storage.add_run("b", {"state": {"code": "y" * 600}})
+    
+    assert storage.get_run("a") is None
+    assert storage.get_run("b") is not None
+    stats = storage.stats()
+    assert stats["runs"] == 1
+    assert stats["run_bytes"] <= 1000
+    assert stats["largest_runs"][0]["run_id"] == "b"
+
+def test_runs_and_graphs_expire_after_ttl():
+    storage.configure(ttl_seconds=0.05)
+    
+    storage.add_graph("g", object())
+    storage.add_run("r", {"state": {}})
+    time.sleep(0.1)
+    
+    assert storage.get_run("r") is None
+    assert storage.get_graph("g") is None
+    assert storage.stats()["run_bytes"] == 0
+    assert storage.stats()["evictions"]["graphs"]["ttl"] >= 1
+
+def test_graph_capacity_limit():
+    storage.configure(max_graphs=1)
+    
+    storage.add_graph("g1", object())
+    storage.add_graph("g2", object())
+    
+    assert storage.list_graphs() == ["g2"]
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / "runs.db")
+
+def test_sqlite_storage_shared_between_workers(sqlite_path):
+    worker_a = SQLiteStorage(sqlite_path, batch_size=100)
+    worker_b = SQLiteStorage(sqlite_path)
+    
+    worker_a.add_graph("g1", build_workflow("code_review", "g1", {"max_iterations": 7}))
+    worker_a.add_run("r1", {"graph_id": "g1", "status": "completed", "state": {"score": 90}})
+    
+    assert worker_a.get_run("r1")["state"] == {"score": 90}
+    worker_a.flush()
+    
+    assert worker_b.get_run("r1")["state"] == {"score": 90}
+    graph = worker_b.get_graph("g1")
+    assert graph.workflow_type == "code_review"
+    assert graph.max_iterations == 7
+    assert worker_b.list_graphs() == ["g1"]
+    assert worker_b.list_runs() == ["r1"]
+    
+    worker_a.close()
+    worker_b.close()
+
+def test_sqlite_storage_batches_writes(sqlite_path):
+    backend = SQLiteStorage(sqlite_path, batch_size=3, flush_interval=60)
+    
+    for i in range(7):
+        backend.add_run(f"r{i}", {"graph_id": "g", "status": "running", "state": {}})
+    backend.add_run("r0", {"graph_id": "g", "status": "completed", "state": {"done": True}})
+    
+    assert backend.batches_flushed == 2
+    stats = backend.stats()
+    assert stats["runs"] == 7
+    assert stats["rows_flushed"] == 8
+    assert backend.get_run("r0")["status"] == "completed"
+    
+    backend.close()
+
+def test_sqlite_storage_rejects_graphs_without_workflow_type(sqlite_path):
+    backend = SQLiteStorage(sqlite_path)
+    
+    with pytest.raises(ValueError):
+        backend.add_graph("g", object())
+    
+    backend.close()
+
+def test_create_storage_from_url(sqlite_path):
+    assert create_storage("memory") is storage
+    backend = create_storage(f"sqlite:{sqlite_path}")
+    assert isinstance(backend, SQLiteStorage)
+    backend.close()
+    
+    with pytest.raises(ValueError):
+        create_storage("redis://localhost")
+
+@pytest.fixture(params=["memory", "sqlite"])
+def paged_backend(request, tmp_path):
+    if request.param == "memory":
+        yield storage
+        return
+    backend = SQLiteStorage(str(tmp_path / "paged.db"), flush_interval=60)
+    yield backend
+    backend.close()
+
+def _all_pages(list_page, **options):
+    items, cursor = list_page(2, **options)
+    while cursor is not None:
+        page, cursor = list_page(2, cursor, **options)
+        items.extend(page)
+    return items
+
+def test_run_pages_follow_creation_order_and_filters(paged_backend):
+    for i in range(6):
+        paged_backend.add_run(f"r{i}", {"graph_id": f"g{i % 2}", "status": "queued" if i % 3 else "completed"})
+        time.sleep(0.002)
+        if i == 2:
+            middle = time.time()
+            time.sleep(0.002)
+    paged_backend.add_run("r1", {"graph_id": "g1", "status": "completed"})
+    
+    assert _all_pages(paged_backend.list_runs_page) == [f"r{i}" for i in range(6)]
+    assert _all_pages(paged_backend.list_runs_page, order="desc") == [f"r{i}" for i in reversed(range(6))]
+    assert _all_pages(paged_backend.list_runs_page, status="completed") == ["r0", "r1", "r3"]
+    assert _all_pages(paged_backend.list_runs_page, status="queued", graph_id="g0") == ["r2", "r4"]
+    assert _all_pages(paged_backend.list_runs_page, created_after=middle) == ["r3", "r4", "r5"]
+    assert _all_pages(paged_backend.list_runs_page, order="desc", created_before=middle) == ["r2", "r1", "r0"]
+    assert paged_backend.list_runs_page(10, status="failed") == ([], None)
+    with pytest.raises(ValueError):
+        paged_backend.list_runs_page(2, "not-a-cursor")
+
+def test_graph_pages_filter_by_workflow_type(paged_backend):
+    for i in range(3):
+        paged_backend.add_graph(f"g{i}", build_workflow("code_review", f"g{i}", {"max_iterations": i + 1}))
+    
+    assert _all_pages(paged_backend.list_graphs_page) == ["g0", "g1", "g2"]
+    assert _all_pages(paged_backend.list_graphs_page, workflow_type="code_review", order="desc") == ["g2", "g1", "g0"]
+    assert paged_backend.list_graphs_page(5, workflow_type="other") == ([], None)
+
+def test_memory_run_index_drops_evicted_and_stale_entries():
+    storage.configure(max_runs=3)
+    
+    for i in range(200):
+        storage.add_run(f"r{i}", {"graph_id": "g", "status": "running"})
+        storage.add_run(f"r{i}", {"graph_id": "g", "status": "completed"})
+    
+    assert storage.list_runs_page(10) == (["r197", "r198", "r199"], None)
+    assert storage.list_runs_page(10, status="running") == ([], None)
+    assert len(storage._run_index._lists[("status", "completed")]) < 100
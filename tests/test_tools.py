@@ -0,0 +1,132 @@
+import pytest
+from app.tools import batch_scoring
+from app.tools.code_tools import (
+    analyze_code,
+    analyze_code_incremental,
+    extract_functions,
+    calculate_quality_score,
+    check_complexity,
+    detect_issues
+)
+
+SAMPLE = '''
+import asyncio
+
+def branchy(a, b):
+    if a and b:
+        return 1
+    for i in range(a):
+        if i % 2:
+            continue
+    return [x for x in range(b) if x]
+
+async def fetch(url):
+    await asyncio.sleep(0)
+    return url
+
+class Service:
+    def handle(self, request):
+        def inner():
+            return request
+        return inner()
+'''
+
+def test_analyzer_covers_async_functions_and_methods():
+    result = extract_functions(SAMPLE)
+    by_name = {func["name"]: func for func in result["functions"]}
+    
+    assert result["count"] == 4
+    assert by_name["fetch"]["async"] is True
+    assert by_name["handle"]["class"] == "Service"
+    assert by_name["handle"]["args"] == 2
+    assert by_name["inner"]["class"] is None
+    assert by_name["branchy"]["lineno"] == 4
+    assert by_name["branchy"]["end_lineno"] == 10
+
+def test_analyzer_cyclomatic_complexity_and_nesting():
+    by_name = {func["name"]: func for func in extract_functions(SAMPLE)["functions"]}
+    
+    assert by_name["branchy"]["cyclomatic"] == 7
+    assert by_name["branchy"]["nesting"] == 2
+    assert by_name["fetch"]["cyclomatic"] == 1
+    assert by_name["handle"]["cyclomatic"] == 1
+    
+    scores = {s["name"]: s["complexity"] for s in check_complexity(list(by_name.values()))["scores"]}
+    assert scores["branchy"] == 7
+    assert scores["fetch"] == 1
+
+def test_detect_issues_reports_long_lines_and_deep_nesting():
+    deep = "def deep(x):\n" + "".join("    " * (i + 1) + f"if x > {i}:\n" for i in range(6)) + "    " * 7 + "return x\n"
+    code = deep + "y = '" + "a" * 130 + "'\n"
+    
+    functions = extract_functions(code)["functions"]
+    issues = detect_issues(code, functions)["issues"]
+    
+    assert {"type": "line_length", "severity": "info", "line": 9,
+            "message": "Line exceeds 120 characters"} in issues
+    assert any(issue["type"] == "nesting" and issue["function"] == "deep" for issue in issues)
+
+def test_analysis_is_cached_per_source():
+    code = SAMPLE + "\n# cached\n"
+    
+    assert analyze_code(code) is analyze_code(code)
+    first = extract_functions(code)
+    first["functions"][0]["name"] = "mutated"
+    assert extract_functions(code)["functions"][0]["name"] == "branchy"
+
+def test_unparseable_source_falls_back_to_scan():
+    result = extract_functions("def broken(a, b:\n    pass\n")
+    
+    assert result["count"] == 1
+    assert result["functions"][0]["name"] == "broken"
+    assert analyze_code("def broken(a, b:\n    pass\n")["parsed"] is False
+
+def test_incremental_analysis_reuses_unchanged_blocks():
+    blocks = [f"def func_{i}(a, b):\n    if a:\n        return b\n    return a\n" for i in range(20)]
+    base = "import os\n\n" + "\n".join(blocks) + "\nclass Box:\n    def get(self):\n        return 1\n"
+    edited = base.replace("def func_7(a, b):\n    if a:", "def func_7(a, b):\n    while a:")
+    
+    first = analyze_code_incremental(base)
+    second = analyze_code_incremental(edited, first["code_hash"])
+    
+    assert first["functions"] == analyze_code(base)["functions"]
+    assert second["functions"] == analyze_code(edited)["functions"]
+    assert second["incremental"] is True
+    assert second["reused_blocks"] == second["blocks"] - 1
+    assert analyze_code_incremental(edited) is second
+
+def test_incremental_analysis_falls_back_when_split_breaks_syntax():
+    code = "text = \"\"\"\ndef not_a_function():\n\"\"\"\n\ndef real():\n    return text\n"
+    
+    analysis = analyze_code_incremental(code)
+    
+    assert analysis["incremental"] is False
+    assert [func["name"] for func in analysis["functions"]] == ["real"]
+
+def _files():
+    return [
+        (extract_functions(SAMPLE)["functions"], detect_issues(SAMPLE, extract_functions(SAMPLE)["functions"])),
+        ([], {"issues": [{"severity": "warning"}] * 40}),
+        ([{"name": "big", "lines": 60, "args": 6, "cyclomatic": 9}, {"name": "ok", "lines": 4, "args": 1}],
+         {"issues": [{"severity": "info"}, {"severity": "warning"}]})
+    ]
+
+def _assert_batch_matches_scalar():
+    files = _files()
+    result = batch_scoring.score_batch(**batch_scoring.columns(files))
+    
+    expected_complexity = [s["complexity"] for funcs, _ in files for s in check_complexity(funcs)["scores"]]
+    assert [int(score) for score in result["complexity"]] == expected_complexity
+    for index, (funcs, issues) in enumerate(files):
+        complexity = check_complexity(funcs)
+        assert float(result["average"][index]) == complexity["average"]
+        assert int(result["high_complexity"][index]) == len(complexity["high_complexity"])
+        assert float(result["quality_score"][index]) == calculate_quality_score(complexity, issues)
+
+def test_batch_scoring_matches_scalar_with_numpy():
+    pytest.importorskip("numpy")
+    _assert_batch_matches_scalar()
+
+def test_batch_scoring_matches_scalar_without_numpy(monkeypatch):
+    monkeypatch.setattr(batch_scoring, "np", None)
+    _assert_batch_matches_scalar()
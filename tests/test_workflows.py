@@ -0,0 +1,98 @@
+import io
+import tarfile
+import pytest
+from app.workflows import build_workflow
+from app.workflows.repo_review import RepoReport, review_source
+
+CLEAN = "def add(a, b):\n    return a + b\n"
+BRANCHY = "def branchy(x):\n" + "".join(f"    if x == {i}:\n        return {i}\n" for i in range(12)) + "    return x\n"
+
+def write_tree(root):
+    (root / "pkg").mkdir()
+    (root / "pkg" / "clean.py").write_text(CLEAN)
+    (root / "pkg" / "branchy.py").write_text(BRANCHY)
+    (root / "top.py").write_text(CLEAN)
+    (root / "notes.txt").write_text("not python")
+    (root / ".git").mkdir()
+    (root / ".git" / "hook.py").write_text(CLEAN)
+    (root / "big.py").write_text("x = 1\n" * 1000)
+
+def test_review_source_summarizes_a_file():
+    summary = review_source("pkg/branchy.py", BRANCHY)
+    
+    assert summary["functions"] == 1
+    assert summary["high_complexity"] == 1
+    assert summary["quality_score"] < review_source("pkg/clean.py", CLEAN)["quality_score"]
+
+def test_report_keeps_only_the_worst_files():
+    report = RepoReport(top_files=2)
+    for index in range(10):
+        report.add({**review_source(f"m/f{index}.py", CLEAN), "quality_score": index * 10})
+    result = report.result()
+    
+    assert [summary["path"] for summary in result["worst_files"]] == ["m/f0.py", "m/f1.py"]
+    assert result["repo"]["files"] == 10
+    assert result["modules"]["m"]["files"] == 10
+
+@pytest.mark.asyncio
+async def test_repo_review_walks_directory(tmp_path):
+    write_tree(tmp_path)
+    graph = build_workflow("repo_review", "repo", {
+        "allowed_root": str(tmp_path), "executor": "thread", "window": 2, "max_file_bytes": 1000
+    })
+    
+    state, log = await graph.run({"path": "."})
+    
+    assert log[-1]["status"] == "success"
+    assert state.data["repo"]["files"] == 3
+    assert state.data["repo"]["skipped_files"] == 1
+    assert set(state.data["modules"]) == {".", "pkg"}
+    assert state.data["worst_files"][0]["path"] == "pkg/branchy.py"
+    assert state.data["suggestions"][0]["suggestion"].startswith("Review pkg")
+
+@pytest.mark.asyncio
+async def test_repo_review_survives_bad_symlinks(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "good.py").write_text(CLEAN)
+    (root / "dangling.py").symlink_to(root / "missing.py")
+    (tmp_path / "secret.py").write_text(CLEAN)
+    (root / "escape.py").symlink_to(tmp_path / "secret.py")
+    (root / "alias.py").symlink_to(root / "good.py")
+    graph = build_workflow("repo_review", "repo", {"allowed_root": str(root), "executor": "inline"})
+    
+    state, log = await graph.run({"path": "."})
+    
+    assert log[-1]["status"] == "success"
+    assert state.data["repo"]["files"] == 2
+    assert state.data["repo"]["failed_files"] == 1
+    assert state.data["repo"]["skipped_files"] == 1
+    assert state.data["errors"][0]["path"] == "dangling.py"
+
+@pytest.mark.asyncio
+async def test_repo_review_streams_tarball(tmp_path):
+    archive = tmp_path / "repo.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        for name, code in (("repo/a.py", CLEAN), ("repo/lib/b.py", BRANCHY)):
+            info = tarfile.TarInfo(name)
+            info.size = len(code)
+            tar.addfile(info, io.BytesIO(code.encode()))
+    graph = build_workflow("repo_review", "repo", {"allowed_root": str(tmp_path), "executor": "inline"})
+    
+    state, _ = await graph.run({"tarball": "repo.tar.gz", "files": [{"path": "inline.py", "code": CLEAN}]})
+    
+    assert state.data["repo"]["files"] == 3
+    assert set(state.data["modules"]) == {".", "repo", "repo/lib"}
+
+@pytest.mark.asyncio
+async def test_repo_review_rejects_paths_outside_root(tmp_path):
+    graph = build_workflow("repo_review", "repo", {"allowed_root": str(tmp_path / "sandbox"), "executor": "inline"})
+    (tmp_path / "sandbox").mkdir()
+    
+    _, log = await graph.run({"path": "../"})
+    
+    assert log[-1]["status"] == "error"
+    assert "outside the allowed root" in log[-1]["error"]
+    
+    _, log = await build_workflow("repo_review", "repo", {"executor": "inline"}).run({"path": "."})
+    assert "allowed_root" in log[-1]["error"]